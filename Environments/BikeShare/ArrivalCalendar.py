@@ -0,0 +1,53 @@
+import numpy as np
+
+'''
+Calendar queue of the bikes that are in transit in a bike share simulation
+
+There is one bucket per tick up to the horizon, each bucket holds how many bikes will arrive at every
+station on that tick. Scheduling a batch of trips is a single scatter into the buckets and advancing the
+clock empties exactly one bucket, so the cost per tick does not depend on how many trips are in flight.
+Travel times must be at least one tick and less than the horizon.
+'''
+class ArrivalCalendar:
+
+    def __init__(self, numStations, horizon):
+        self.numStations = numStations
+        self.horizon = horizon
+        self.buckets = np.zeros((horizon, numStations))
+        self.clock = 0
+        self.inTransit = 0
+
+    '''
+    Remove every scheduled arrival and restart the clock
+    '''
+    def clear(self):
+        self.buckets.fill(0)
+        self.clock = 0
+        self.inTransit = 0
+
+    '''
+    Queue bikes to arrive at stations after travelTimes ticks, both may be arrays or single values
+    '''
+    def schedule(self, stations, travelTimes):
+        stations = np.atleast_1d(stations)
+        travelTimes = np.atleast_1d(travelTimes)
+        if stations.size == 0:
+            return
+        if travelTimes.min() < 1 or travelTimes.max() >= self.horizon:
+            raise Exception("Travel times must be between 1 and {horizon} ticks".format(horizon=self.horizon - 1))
+        slots = (self.clock + travelTimes) % self.horizon
+        np.add.at(self.buckets, (slots, stations), 1)
+        self.inTransit += stations.size
+
+    '''
+    Move the clock forward one tick and return the arrivals that are now due
+    as (stations, number of bikes arriving at each of them)
+    '''
+    def advance(self):
+        self.clock += 1
+        bucket = self.buckets[self.clock % self.horizon]
+        stations = np.flatnonzero(bucket)
+        arrivals = bucket[stations]
+        bucket[stations] = 0
+        self.inTransit -= int(arrivals.sum())
+        return stations, arrivals
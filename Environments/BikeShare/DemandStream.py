@@ -0,0 +1,216 @@
+import numpy as np
+
+'''
+Streams of trip requests for the bike share simulations
+
+Requests are pre-sampled in blocks from a np.random.Generator owned by the stream and handed out
+from a cursor, a new block is only drawn once the current one has been used up. Each environment
+owns its stream so parallel workers get independent, reproducible requests.
+
+Stations are identified by a flat index, on an L x W grid station (l, w) has index l * W + w
+'''
+
+
+'''
+Walker's alias table for sampling from a discrete distribution in O(1) per draw
+'''
+class AliasTable:
+
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=np.float64).ravel()
+        if weights.size == 0 or weights.min() < 0 or weights.sum() <= 0:
+            raise Exception("Alias table weights must be non-negative with a positive sum")
+        size = weights.size
+        scaled = weights * size / weights.sum()
+
+        self.size = size
+        self.prob = np.ones(size)
+        self.alias = np.arange(size)
+
+        # Vose's method, pair every under-full column with an over-full one
+        small = list(np.flatnonzero(scaled < 1.0))
+        large = list(np.flatnonzero(scaled >= 1.0))
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+
+    '''
+    Draw count indices using the given generator
+    '''
+    def sample(self, rng, count):
+        column = rng.integers(self.size, size=count)
+        keep = rng.random(count) < self.prob[column]
+        return np.where(keep, column, self.alias[column])
+
+
+'''
+Block sampled stream of [origin, destination] requests, origin and destination both drawn uniformly over
+every station
+Subclasses with other distributions override _sampleBlock(start, count) which returns the origins and
+destinations of the requests numbered start to start + count - 1
+'''
+class DemandStream:
+
+    def __init__(self, numStations, blockSize=4096, seed=None):
+        self.numStations = numStations
+        self.blockSize = blockSize
+        self.seed(seed)
+
+    '''
+    Reseed the generator and throw away any requests that were already sampled
+    A Generator may be given instead of a seed to share it with other parts of an environment
+    '''
+    def seed(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.origins = np.zeros(0, dtype=np.int64)
+        self.destinations = np.zeros(0, dtype=np.int64)
+        self._originList = []
+        self._destinationList = []
+        self.cursor = 0
+        # Number of requests sampled before the current block and the generator state it was sampled from
+        self.blockStart = 0
+        self._blockRngState = None
+        return [seed]
+
+    '''
+    Sample the next block of requests
+    '''
+    def _refill(self):
+        self.blockStart += len(self.origins)
+        self._blockRngState = self.rng.bit_generator.state
+        self.origins, self.destinations = self._sampleBlock(self.blockStart, self.blockSize)
+        self._listBlock()
+        self.cursor = 0
+
+    def _listBlock(self):
+        # Python ints make handing out single requests cheaper than indexing into the arrays
+        self._originList = self.origins.tolist()
+        self._destinationList = self.destinations.tolist()
+
+    '''
+    Snapshot of the stream, the position in the current block, the generator state the block was
+    sampled from and the current generator state, the block itself is not copied
+    '''
+    def get_state(self):
+        return (self.blockStart, len(self.origins), self.cursor, self._blockRngState, self.rng.bit_generator.state)
+
+    '''
+    Restore a snapshot taken by get_state, the block is only sampled again if a different one is loaded
+    '''
+    def set_state(self, state):
+        blockStart, blockLength, cursor, blockRngState, rngState = state
+        if blockStart != self.blockStart or blockLength != len(self.origins) or blockRngState != self._blockRngState:
+            if blockRngState is None:
+                self.origins = np.zeros(0, dtype=np.int64)
+                self.destinations = np.zeros(0, dtype=np.int64)
+            else:
+                self.rng.bit_generator.state = blockRngState
+                self.origins, self.destinations = self._sampleBlock(blockStart, self.blockSize)
+            self._listBlock()
+            self.blockStart = blockStart
+            self._blockRngState = blockRngState
+        self.cursor = cursor
+        self.rng.bit_generator.state = rngState
+
+    '''
+    Raise an exception unless the stream draws the stations of a network of numStations stations
+    '''
+    def checkStations(self, numStations):
+        if self.numStations != numStations:
+            raise Exception("The demand stream draws {streamStations} stations, the network has {numStations}".format(
+                streamStations=self.numStations, numStations=numStations))
+
+    '''
+    Return the next request as (origin, destination)
+    '''
+    def next(self):
+        if self.cursor == len(self._originList):
+            self._refill()
+        cursor = self.cursor
+        self.cursor += 1
+        return self._originList[cursor], self._destinationList[cursor]
+
+    '''
+    Return the next count requests as two arrays, origins and destinations
+    '''
+    def take(self, count):
+        origins = np.empty(count, dtype=np.int64)
+        destinations = np.empty(count, dtype=np.int64)
+        filled = 0
+        while filled < count:
+            if self.cursor == len(self.origins):
+                self._refill()
+            chunk = min(count - filled, len(self.origins) - self.cursor)
+            origins[filled:filled + chunk] = self.origins[self.cursor:self.cursor + chunk]
+            destinations[filled:filled + chunk] = self.destinations[self.cursor:self.cursor + chunk]
+            self.cursor += chunk
+            filled += chunk
+        return origins, destinations
+
+    def _sampleBlock(self, start, count):
+        pairs = self.rng.integers(self.numStations, size=(2, count))
+        return pairs[0], pairs[1]
+
+
+'''
+Origin and destination are both drawn uniformly over every station, the sampling of DemandStream
+'''
+class UniformDemand(DemandStream):
+    pass
+
+
+'''
+Requests follow a fixed origin/destination matrix, matrix[o][d] is the relative rate of trips from o to d
+'''
+class ODMatrixDemand(DemandStream):
+
+    def __init__(self, matrix, blockSize=4096, seed=None):
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if matrix.ndim != 2 or matrix.shape[0] != matrix.shape[1]:
+            raise Exception("An origin/destination matrix must be numStations x numStations, not {shape}".format(
+                shape=matrix.shape))
+        super().__init__(matrix.shape[0], blockSize, seed)
+        self.table = AliasTable(matrix)
+
+    def _sampleBlock(self, start, count):
+        pairs = self.table.sample(self.rng, count)
+        return np.divmod(pairs, self.numStations)
+
+
+'''
+Requests follow a different origin/destination matrix for each period of the day
+
+profiles holds one numStations x numStations matrix per period, the period advances every
+requestsPerPeriod requests and wraps around after the last one
+'''
+class TimeOfDayDemand(DemandStream):
+
+    def __init__(self, profiles, requestsPerPeriod, blockSize=4096, seed=None):
+        profiles = np.asarray(profiles, dtype=np.float64)
+        if profiles.ndim != 3 or profiles.shape[1] != profiles.shape[2]:
+            raise Exception("Profiles must be periods x numStations x numStations, not {shape}".format(
+                shape=profiles.shape))
+        super().__init__(profiles.shape[1], blockSize, seed)
+        self.requestsPerPeriod = requestsPerPeriod
+        self.tables = [AliasTable(profile) for profile in profiles]
+
+    '''
+    Period of the day that the next request handed out falls in
+    '''
+    def getPeriod(self):
+        return ((self.blockStart + self.cursor) // self.requestsPerPeriod) % len(self.tables)
+
+    def _sampleBlock(self, start, count):
+        periods = ((start + np.arange(count)) // self.requestsPerPeriod) % len(self.tables)
+        pairs = np.empty(count, dtype=np.int64)
+        for period in np.unique(periods):
+            inPeriod = periods == period
+            pairs[inPeriod] = self.tables[period].sample(self.rng, int(inPeriod.sum()))
+        return np.divmod(pairs, self.numStations)
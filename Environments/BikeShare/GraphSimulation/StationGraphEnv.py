@@ -0,0 +1,102 @@
+from Environments.BikeShare.GraphSimulation.StationGraph_core import StationGraph_core
+import gym
+from gym import spaces
+import numpy as np
+
+'''
+An interface for the station graph bikeshare environment
+'''
+class StationGraphEnv(gym.Env):
+
+    metadata = {'render.modes': ['human']}
+
+    def __init__(self, indptr, indices, edgeCosts, initialSupply, actionsPerEpisode, targetSupply=5,
+                 demand=None, seed=None, metrics=None):
+        self.env = StationGraph_core(indptr, indices, edgeCosts, initialSupply, actionsPerEpisode,
+                                     targetSupply, demand, seed, metrics)
+        self.name = "Station_Graph_{}".format(self.env.numStations)
+        # Action k moves the request to the k-th neighbor of its start station
+        self.action_space = spaces.Discrete(max(self.env.maxDegree, 1))
+        self.observation_space = spaces.Box(0.0, 1.0, shape=(self.env.numStations,), dtype=np.float32)
+        self.time_steps = 0
+
+    '''
+    Reset the environment
+    '''
+    def reset(self):
+        # A sink writing to disk gets every finished episode written out before the next one starts
+        if self.env.metrics.path is not None:
+            self.env.metrics.flush()
+        return self.env.reset()
+
+    '''
+    Seed the environment's request stream
+    '''
+    def seed(self, seed=None):
+        return self.env.seed(seed)
+
+    '''
+    Return the number of stations
+    '''
+    def getNumStations(self):
+        return self.env.numStations
+
+    '''
+    Return the environment name
+    '''
+    def getName(self):
+        return self.name
+
+    '''
+    Return the state as
+    [stateVector, nextInterest]
+    '''
+    def getState(self):
+        return self.env.getState()
+
+    '''
+    Show the environment
+    '''
+    def render(self, method='human'):
+        self.env.render()
+
+    '''
+    have the environment step
+    action is the position in the start station's neighbor list that the user is offered to move to
+    '''
+    def step(self, action):
+        return self.env.step(action)
+
+    '''
+    A list of the unservice ratios
+    '''
+    def getUnserviceRatios(self):
+        return self.env.getUnserviceRatios()
+
+    '''
+    A list of expenses
+    '''
+    def getExpenses(self):
+        return self.env.getExpenses()
+
+    '''
+    The metrics sink holding the recent history and running aggregates of the metrics
+    '''
+    def getMetrics(self):
+        return self.env.getMetrics()
+
+    '''
+    Returns the intended next move as a vector for use in a neural network
+    '''
+    def getNextMoveAsVector(self):
+        return self.env.getNextMoveAsVector()
+
+    '''
+    Returns the neighborhood features of the given stations, or every station
+    '''
+    def getNeighborhoods(self, stations=None):
+        return self.env.getNeighborhoods(stations)
+
+    def close(self):
+        self.reset()
+        self.env.metrics.close()
@@ -0,0 +1,256 @@
+from Environments.BikeShare.DemandStream import UniformDemand
+from Environments.BikeShare.MetricsSink import MetricsSink
+import numpy as np
+
+'''
+This simulates a bike share system whose stations form an arbitrary graph instead of a grid
+The graph is stored as CSR adjacency arrays, the neighbors of station s are
+indices[indptr[s]:indptr[s+1]] and moving to them costs edgeCosts[indptr[s]:indptr[s+1]]
+
+An incentive k asks the user of the next request to start from the k-th neighbor of their station
+instead, any k past the station's degree leaves the request where it is. As in UniformTile_core the
+departures are held in stateChange until the end of the episode and the reward is the change in the
+mean absolute difference between each station's supply and targetSupply.
+'''
+class StationGraph_core:
+
+    def __init__(self, indptr, indices, edgeCosts, initialSupply, actionsPerEpisode, targetSupply=5,
+                 demand=None, seed=None, metrics=None):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.edgeCosts = np.asarray(edgeCosts, dtype=np.float64)
+        self.numStations = len(self.indptr) - 1
+        self.degree = np.diff(self.indptr)
+        self.maxDegree = int(self.degree.max()) if self.numStations > 0 else 0
+
+        # Padded neighbor tables, missing neighbors point at the sentinel slot numStations
+        self.neighborTable, self.neighborCosts = self._buildNeighborTables()
+        # Row s gathers [station s, neighbors of s...] out of the padded supply
+        self.featureIndex = np.hstack([np.arange(self.numStations)[:, np.newaxis], self.neighborTable])
+
+        # The stream of requests, kept across resets so the sequence continues
+        self.demand = demand if demand is not None else UniformDemand(self.numStations, seed=seed)
+        self.demand.checkStations(self.numStations)
+
+        # Supply of every station followed by a -1 sentinel, state is a view of the real stations
+        self.initialSupply = np.broadcast_to(np.asarray(initialSupply, dtype=np.float64), (self.numStations,)).copy()
+        self.paddedState = np.append(self.initialSupply, -1.0)
+        self.state = self.paddedState[:self.numStations]
+
+        # Running sum of abs(targetSupply - supply) over every station, updated as stations change
+        self.targetSupply = targetSupply
+        self.errorSum = self._computeErrorSum()
+
+        self.nextInterest = self._generateNextInterest()
+
+        # Initializes values for handling episode timing
+        self.actionsPerEpisode = actionsPerEpisode
+        self.remainingActions = actionsPerEpisode
+
+        # The vector to readjust the state upon completion of an episode
+        self.stateChange = np.zeros(self.numStations)
+
+        # Initialization of metrics
+        self.unservice = 0
+        self.expense = 0
+
+        # Records metrics for evaluation, kept across resets
+        self.metrics = metrics if metrics is not None else MetricsSink(['unserviceRatio', 'expense'])
+
+        self.prevError = 0
+
+    '''
+    Resets the environment in place
+    '''
+    def reset(self):
+        self.state[:] = self.initialSupply
+        self.stateChange.fill(0)
+        self.errorSum = self._computeErrorSum()
+        self.remainingActions = self.actionsPerEpisode
+        self.unservice = 0
+        self.expense = 0
+        self.prevError = 0
+        self._generateNextInterest()
+        return np.array(self.state)
+
+    '''
+    Expand the CSR arrays into (numStations, maxDegree) neighbor and cost tables
+    '''
+    def _buildNeighborTables(self):
+        neighborTable = np.full((self.numStations, self.maxDegree), self.numStations, dtype=np.int64)
+        neighborCosts = np.zeros((self.numStations, self.maxDegree))
+        rows = np.repeat(np.arange(self.numStations), self.degree)
+        slots = np.arange(len(self.indices)) - self.indptr[rows]
+        neighborTable[rows, slots] = self.indices
+        neighborCosts[rows, slots] = self.edgeCosts
+        return neighborTable, neighborCosts
+
+    '''
+    Full sum of abs(targetSupply - supply) over every station
+    '''
+    def _computeErrorSum(self):
+        return float(np.abs(self.targetSupply - self.state).sum())
+
+    '''
+    nextMove encoded as [start station, end station]
+    '''
+    def _generateNextInterest(self):
+        origin, destination = self.demand.next()
+        self.nextInterest = [origin, destination]
+        return self.nextInterest
+
+    '''
+    Reseed the demand stream
+    '''
+    def seed(self, seed=None):
+        return self.demand.seed(seed)
+
+    '''
+    Returns the state and next interest
+
+    [stateVector, nextInterest]
+    '''
+    def getState(self):
+        return [self.state, self.nextInterest]
+
+    '''
+    Return the neighbors of a station
+    '''
+    def getNeighbors(self, station):
+        return self.indices[self.indptr[station]:self.indptr[station+1]]
+
+    '''
+    Return [supply of station, supply of each neighbor...] for the given stations, or every station,
+    padded with -1 up to maxDegree neighbors
+    '''
+    def getNeighborhoods(self, stations=None):
+        if stations is None:
+            return self.paddedState[self.featureIndex]
+        return self.paddedState[self.featureIndex[stations]]
+
+    '''
+    Redefine the next move as a vector, useful for neural networks
+    '''
+    def getNextMoveAsVector(self):
+        return self.paddedState[self.featureIndex[self.nextInterest[0]]][np.newaxis]
+
+    '''
+    Print to screen the current state
+    '''
+    def render(self):
+        print('\t'.join(str(supply) for supply in self.state))
+
+    '''
+    Return the most recent unservice ratios, oldest first
+    '''
+    def getUnserviceRatios(self):
+        return self.metrics['unserviceRatio'].values()
+
+    '''
+    Return the most recent expenses, oldest first
+    '''
+    def getExpenses(self):
+        return self.metrics['expense'].values()
+
+    '''
+    Return the metrics sink, which also holds the running aggregates of every episode
+    '''
+    def getMetrics(self):
+        return self.metrics
+
+    '''
+    incentive is the position in the start station's neighbor list to move the request to
+    '''
+    def step(self, incentive):
+        startStation, endStation = self.nextInterest
+
+        stepExpense = 0
+
+        '''
+        Move the start to the chosen neighbor if the station has one in that position
+        '''
+        if 0 <= incentive < self.degree[startStation]:
+            stepExpense = float(self.neighborCosts[startStation, incentive])
+            startStation = self.neighborTable[startStation, incentive]
+
+        supply = self.state[startStation]
+        if supply > 0:
+            # immediately depart, only this station's share of the error changes
+            self.state[startStation] = supply - 1
+            self.errorSum += abs(self.targetSupply - supply + 1) - abs(self.targetSupply - supply)
+
+            # wait to report changes and arrive
+            self.stateChange[endStation] += 1
+            self.expense += stepExpense
+        else:
+            # Request failed
+            self.unservice += 1
+        error = self.errorSum / self.numStations
+        outReward = self.prevError - error
+
+        self.prevError = error
+        # Create next interest
+        self._generateNextInterest()
+        done = False
+        # Check if the episode is complete
+        self.remainingActions -= 1
+        if self.remainingActions == 0:
+            done = True
+            self.resetEpisode()
+
+        return np.array(self.state), outReward, done, {}
+
+    '''
+    Reset for the next episode
+    '''
+    def resetEpisode(self):
+        # Reset counter
+        self.remainingActions = self.actionsPerEpisode
+        # Reallocate the previous activity elements of the vector
+        self.state += self.stateChange
+        self.stateChange.fill(0)
+        # Arrivals can touch any station so the error is recomputed once per episode
+        self.errorSum = self._computeErrorSum()
+
+        # Save metrics
+        self.metrics.record(unserviceRatio=self.unservice/self.actionsPerEpisode, expense=self.expense)
+
+        # reset unservice ratio, but not expense
+        self.unservice = 0
+
+
+'''
+Build CSR adjacency arrays (indptr, indices, edgeCosts) from a list of directed edges
+When symmetric is True every edge is also added in the reverse direction with the same cost
+'''
+def buildStationGraph(numStations, sources, targets, costs, symmetric=False):
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    costs = np.broadcast_to(np.asarray(costs, dtype=np.float64), sources.shape)
+    if symmetric:
+        sources, targets = np.concatenate([sources, targets]), np.concatenate([targets, sources])
+        costs = np.concatenate([costs, costs])
+    # Stable so that each station keeps its neighbors in the order they were given
+    order = np.argsort(sources, kind='stable')
+    indptr = np.zeros(numStations + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=numStations), out=indptr[1:])
+    return indptr, targets[order], costs[order]
+
+
+'''
+The station graph of an L x W grid, station (l, w) is l * W + w and every station lists exactly four neighbors
+in the order down, up, right, left, so incentive k is the same direction as in UniformTile_core. A direction
+that leaves the grid lists the station itself, moving a request there keeps it where it is as UniformTile_core
+does, but the neighborhood features then show the station's own supply where UniformTile_core shows -1.
+costs is the cost of every move, a scalar or a (4, L * W) array by direction and station, moves that leave the
+grid cost nothing
+'''
+def gridStationGraph(length, width, costs=0):
+    stations = np.arange(length * width)
+    l, w = np.divmod(stations, width)
+    moves = [(l < length - 1, width), (l > 0, -width), (w < width - 1, 1), (w > 0, -1)]
+    costs = np.broadcast_to(np.asarray(costs, dtype=np.float64), (len(moves), length * width))
+    sources = np.tile(stations, len(moves))
+    targets = np.concatenate([np.where(valid, stations + offset, stations) for valid, offset in moves])
+    edgeCosts = np.concatenate([np.where(valid, cost, 0.0) for (valid, _), cost in zip(moves, costs)])
+    return buildStationGraph(length * width, sources, targets, edgeCosts)
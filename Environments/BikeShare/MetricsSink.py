@@ -0,0 +1,257 @@
+import json
+import os
+import numpy as np
+
+'''
+Streaming storage for the per episode metrics of the bike share simulations
+
+Every metric keeps only a fixed size ring buffer of its most recent values together with online
+aggregates (count, mean, variance, min, max and a quantile sketch), so memory stays flat no matter how
+long a run is. Recorded rows are staged and folded into the aggregates a block at a time, and when a path
+is given each block is also appended to one raw float64 file per metric in that directory, alongside a
+small JSON header, and can be read back with MetricsSink.load. Staged rows only reach the files on flush or
+close, the bike share environments flush a sink with a path on every reset and close it on close.
+'''
+
+
+'''
+Count, mean, variance, min and max of a stream, updated a batch at a time
+'''
+class RunningStats:
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    '''
+    Merge a batch of values into the aggregates (Chan et al. parallel variance update)
+    '''
+    def update(self, values):
+        count = len(values)
+        if count == 0:
+            return
+        batchMean = float(values.mean())
+        batchM2 = float(((values - batchMean) ** 2).sum())
+        total = self.count + count
+        delta = batchMean - self.mean
+        self.mean += delta * count / total
+        self.m2 += batchM2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def variance(self):
+        return self.m2 / self.count if self.count > 0 else 0.0
+
+
+'''
+Mergeable quantile sketch, the stream is summarized by at most size weighted centroids
+A batch of values is merged by sorting it together with the centroids and collapsing the result back
+into size bins of equal weight, so every update is a handful of vectorized operations
+'''
+class QuantileSketch:
+
+    def __init__(self, size=256):
+        self.size = size
+        self.means = np.zeros(0)
+        self.weights = np.zeros(0)
+
+    def update(self, values):
+        means = np.concatenate([self.means, values])
+        weights = np.concatenate([self.weights, np.ones(len(values))])
+        order = np.argsort(means, kind='stable')
+        means = means[order]
+        weights = weights[order]
+        if len(means) > self.size:
+            cumulative = np.cumsum(weights)
+            bins = ((cumulative - weights / 2) / cumulative[-1] * self.size).astype(np.int64)
+            bins = np.minimum(bins, self.size - 1)
+            binWeights = np.bincount(bins, weights, self.size)
+            binSums = np.bincount(bins, weights * means, self.size)
+            keep = binWeights > 0
+            means = binSums[keep] / binWeights[keep]
+            weights = binWeights[keep]
+        self.means = means
+        self.weights = weights
+
+    '''
+    Current estimate of the q quantile
+    '''
+    def value(self, q):
+        if len(self.means) == 0:
+            return float('nan')
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * self.weights.sum(), centers, self.means))
+
+
+'''
+A single metric, the last capacity values in a ring buffer plus the running aggregates of every value
+'''
+class MetricSeries:
+
+    def __init__(self, capacity, quantiles):
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity)
+        self.cursor = 0
+        self.stats = RunningStats()
+        self.sketch = QuantileSketch()
+        self.quantiles = quantiles
+
+    def append(self, values):
+        values = np.atleast_1d(np.asarray(values, dtype=np.float64))
+        self.stats.update(values)
+        self.sketch.update(values)
+
+        # Only the last capacity values can survive in the ring buffer
+        tail = values[-self.capacity:]
+        start = self.cursor + len(values) - len(tail)
+        slots = (start + np.arange(len(tail))) % self.capacity
+        self.buffer[slots] = tail
+        self.cursor = (self.cursor + len(values)) % self.capacity
+
+    '''
+    The most recent values, oldest first
+    '''
+    def values(self):
+        if self.stats.count < self.capacity:
+            return self.buffer[:self.stats.count].copy()
+        return np.roll(self.buffer, -self.cursor)
+
+    def __len__(self):
+        return self.stats.count
+
+    def mean(self):
+        return self.stats.mean
+
+    def variance(self):
+        return self.stats.variance()
+
+    def std(self):
+        return self.stats.variance() ** 0.5
+
+    def min(self):
+        return self.stats.min
+
+    def max(self):
+        return self.stats.max
+
+    '''
+    Estimate of the q quantile
+    '''
+    def quantile(self, q):
+        return self.sketch.value(q)
+
+    '''
+    Summary of the aggregates as a dictionary
+    '''
+    def summary(self):
+        out = {
+            'count': self.stats.count,
+            'mean': self.mean(),
+            'std': self.std(),
+            'min': self.min(),
+            'max': self.max()
+        }
+        for q in self.quantiles:
+            out['q{q}'.format(q=q)] = self.quantile(q)
+        return out
+
+
+'''
+A named set of metrics recorded together, optionally persisted as a columnar file on disk
+'''
+class MetricsSink:
+
+    def __init__(self, columns, capacity=10000, quantiles=(0.5, 0.9, 0.99), path=None, flushEvery=1024):
+        self.columns = list(columns)
+        self.series = {column: MetricSeries(capacity, quantiles) for column in self.columns}
+        self.path = path
+        self.flushEvery = flushEvery
+        self.rowsWritten = 0
+
+        # Rows waiting to be folded into the series and written to disk, one column per metric
+        self._stage = np.zeros((flushEvery, len(self.columns)))
+        self._staged = 0
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            header = os.path.join(path, 'header.json')
+            if os.path.exists(header):
+                with open(header) as f:
+                    self.rowsWritten = json.load(f)['rows']
+
+    '''
+    The series of a metric, staged rows are folded in first so it is up to date
+    '''
+    def __getitem__(self, column):
+        self.flush()
+        return self.series[column]
+
+    '''
+    Record one row, or a batch of rows when arrays are given, every column must be present
+    '''
+    def record(self, **values):
+        row = self._staged
+        if row < self.flushEvery and np.ndim(values[self.columns[0]]) == 0:
+            # A single row only has to be copied into the stage
+            stage = self._stage
+            for i, column in enumerate(self.columns):
+                stage[row, i] = values[column]
+            self._staged = row + 1
+        else:
+            block = np.column_stack([np.atleast_1d(np.asarray(values[column], dtype=np.float64))
+                                     for column in self.columns])
+            self.flush()
+            self._fold(block)
+        if self._staged == self.flushEvery:
+            self.flush()
+
+    '''
+    Fold every staged row into the series and append them to the files on disk
+    '''
+    def flush(self):
+        if self._staged == 0:
+            return
+        block = self._stage[:self._staged]
+        self._staged = 0
+        self._fold(block)
+
+    def _fold(self, block):
+        for i, column in enumerate(self.columns):
+            self.series[column].append(block[:, i])
+        if self.path is None:
+            return
+        for i, column in enumerate(self.columns):
+            with open(os.path.join(self.path, column + '.f64'), 'ab') as f:
+                np.ascontiguousarray(block[:, i], dtype='<f8').tofile(f)
+        self.rowsWritten += len(block)
+        with open(os.path.join(self.path, 'header.json'), 'w') as f:
+            json.dump({'columns': self.columns, 'dtype': '<f8', 'rows': self.rowsWritten}, f)
+
+    '''
+    Summary of every metric
+    '''
+    def summary(self):
+        self.flush()
+        return {column: self.series[column].summary() for column in self.columns}
+
+    def close(self):
+        self.flush()
+
+    '''
+    Read the columns written to path as a dictionary of read only memory mapped arrays
+    '''
+    @staticmethod
+    def load(path):
+        with open(os.path.join(path, 'header.json')) as f:
+            header = json.load(f)
+        out = {}
+        for column in header['columns']:
+            if header['rows'] == 0:
+                out[column] = np.zeros(0)
+            else:
+                out[column] = np.memmap(os.path.join(path, column + '.f64'), dtype=header['dtype'], mode='r',
+                                        shape=(header['rows'],))
+        return out
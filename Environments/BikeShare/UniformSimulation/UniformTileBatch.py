@@ -0,0 +1,259 @@
+from Environments.BikeShare.DemandStream import UniformDemand
+from Environments.BikeShare.MetricsSink import MetricsSink
+from Environments.BikeShare.UniformSimulation.UniformTile_core import UniformTile_core
+import numpy as np
+
+'''
+This simulates N independent bike share systems at once, each one the same n x m grid as UniformTile_core
+Every per city value is kept as a stacked ndarray with a leading batch (city) axis so that a single
+call to step moves all of the cities forward with vectorized operations
+
+    state            (N, L, W)     supply at each station
+    stateChange      (N, L, W)     arrivals waiting to be applied at the end of an episode
+    nextInterest     (N, 4)        [start L, start W, end L, end W] of each city's next request
+    costMatrix       (N, 4, L, W)  cost for moving from a station in each direction
+    remainingActions (N,)          actions left in each city's current episode
+    errorSum         (N,)          running sum of abs(targetSupply - supply) over each city's stations
+
+state is a view into paddedState (N, L * W + 1) whose last column is a -1 sentinel, neighborhood
+features are gathered from it with the same neighborTable as UniformTile_core
+'''
+class UniformTileBatch:
+
+    def __init__(self, numCities, length, width, actionsPerEpisode, targetSupply=5, demand=None, seed=None,
+                 metrics=None, fixedCosts=False):
+        self.numCities = numCities
+        self.fixedCosts = fixedCosts
+        self.length = length
+        self.width = width
+        self.targetSupply = targetSupply
+
+        # A single stream supplies the requests of every city
+        self.demand = demand if demand is not None else UniformDemand(length * width, seed=seed)
+        self.demand.checkStations(length * width)
+
+        # Index of every city, used to gather/scatter one cell per city
+        self._cities = np.arange(numCities)
+
+        # The stacked state tensor representing every environment
+        self.paddedState = np.full((numCities, length * width + 1), -1.0)
+        self.state = self.paddedState[:, :length * width].reshape(numCities, length, width)
+        self.state[:] = self._initState()
+        self.neighborTable = UniformTile_core._buildNeighborTable(length, width)
+        self.errorSum = self._computeErrorSum()
+        self.nextInterest = np.zeros((numCities, 4), dtype=np.int64)
+        self._generateNextInterest()
+
+        # Initializes values for handling episode timing
+        self.actionsPerEpisode = actionsPerEpisode
+        self.remainingActions = np.full(numCities, actionsPerEpisode)
+
+        # The tensor to readjust the state upon completion of an episode
+        self.stateChange = np.zeros((numCities, length, width))
+
+        # Initialization of metrics
+        self.unservice = np.zeros(numCities)
+        self.expense = np.zeros(numCities)
+
+        # Records metrics for evaluation, every completed episode of every city goes to the same sink
+        self.metrics = metrics if metrics is not None else MetricsSink(['unserviceRatio', 'expense'])
+
+        # The cost tensor for moving from one station to the next
+        self.costMatrix = self._generateCostMatrix()
+
+        self.prevError = np.zeros(numCities)
+
+    '''
+    Resets the environments, if cities is given (boolean mask or indices) only those cities are reset
+    '''
+    def reset(self, cities=None):
+        if cities is None:
+            cities = self._cities
+        self.state[cities] = self._initGrid()
+        self.errorSum[cities] = self._computeErrorSum(cities)
+        self.stateChange[cities] = 0
+        self.remainingActions[cities] = self.actionsPerEpisode
+        self.unservice[cities] = 0
+        self.expense[cities] = 0
+        self.prevError[cities] = 0
+        if not self.fixedCosts:
+            self.costMatrix[cities] = self.demand.rng.integers(5, size=self.costMatrix[cities].shape)
+        self.nextInterest[cities] = self._sampleInterest(len(self._cities[cities]))
+        return np.array(self.state)
+
+    '''
+    Initializes the state matrix of a single city, the top half holds 2 bikes and the bottom half 10
+    '''
+    def _initGrid(self):
+        stateMatrix = np.full((self.length, self.width), 10.0)
+        stateMatrix[:int(self.length/2), :] = 2
+        return stateMatrix
+
+    '''
+    Initializes the stacked state tensor
+    '''
+    def _initState(self):
+        return np.repeat(self._initGrid()[np.newaxis], self.numCities, axis=0)
+
+    '''
+    Full sum of abs(targetSupply - supply) over the stations of the selected cities
+    '''
+    def _computeErrorSum(self, cities=slice(None)):
+        return np.abs(self.targetSupply - self.state[cities]).sum(axis=(1, 2))
+
+    '''
+    Take count requests from the demand stream encoded as [start L, start W, end L, end W]
+    '''
+    def _sampleInterest(self, count):
+        origins, destinations = self.demand.take(count)
+        out = np.empty((count, 4), dtype=np.int64)
+        out[:, 0], out[:, 1] = np.divmod(origins, self.width)
+        out[:, 2], out[:, 3] = np.divmod(destinations, self.width)
+        return out
+
+    '''
+    Reseed the demand stream
+    '''
+    def seed(self, seed=None):
+        return self.demand.seed(seed)
+
+    '''
+    nextInterest for every city, encoded as [start station L, start station W, end station L, end station W]
+    '''
+    def _generateNextInterest(self):
+        self.nextInterest[:] = self._sampleInterest(self.numCities)
+        return self.nextInterest
+
+    '''
+    Builds the cost tensor for moving from one station to another in every city
+    '''
+    def _generateCostMatrix(self):
+        return self.demand.rng.integers(5, size=(self.numCities, 4, self.length, self.width)).astype(np.float64)
+
+    '''
+    Returns the stacked states and next interests
+
+    [stateTensor, nextInterest]
+    '''
+    def getState(self):
+        return [self.state, self.nextInterest]
+
+    '''
+    Return the neighborhood features [station, above, below, left, right] of every city's next request
+    as an (N, 5) array, with -1 for neighbors off the grid
+    '''
+    def getNextMoveAsVector(self):
+        stations = self.nextInterest[:, 0] * self.width + self.nextInterest[:, 1]
+        return self.paddedState[self._cities[:, np.newaxis], self.neighborTable[stations]]
+
+    '''
+    Return the neighborhood features of every station of every city as an (N, L * W, 5) array
+    '''
+    def getNeighborhoods(self):
+        return self.paddedState[:, self.neighborTable]
+
+    '''
+    Print to screen the current state of a city
+    '''
+    def render(self, city=0):
+        out = ""
+        for l in range(self.length):
+            for w in range(self.width):
+                out += str(self.state[city][l][w]) + '\t'
+            out += "\n"
+        print(out)
+
+    '''
+    Return the most recent unservice ratios, oldest first
+    '''
+    def getUnserviceRatios(self):
+        return self.metrics['unserviceRatio'].values()
+
+    '''
+    Return the most recent expenses, oldest first
+    '''
+    def getExpenses(self):
+        return self.metrics['expense'].values()
+
+    '''
+    Return the metrics sink, which also holds the running aggregates of every episode
+    '''
+    def getMetrics(self):
+        return self.metrics
+
+    '''
+    actions holds one direction per city
+    0 down
+    1 up
+    2 right
+    3 left
+
+    Returns the stacked states, an array of rewards and an array of done flags
+    '''
+    def step(self, actions):
+        actions = np.asarray(actions)
+        cities = self._cities
+
+        # Prepare for movement
+        startStationL = self.nextInterest[:, 0].copy()
+        startStationW = self.nextInterest[:, 1].copy()
+        endStationL = self.nextInterest[:, 2]
+        endStationW = self.nextInterest[:, 3]
+
+        '''
+        Move the starting location of every city whose incentive points to a valid station
+        '''
+        moveL = ((actions == 0) & (startStationL < self.length-1)).astype(np.int64) \
+            - ((actions == 1) & (startStationL > 0))
+        moveW = ((actions == 2) & (startStationW < self.width-1)).astype(np.int64) \
+            - ((actions == 3) & (startStationW > 0))
+        startStationL += moveL
+        startStationW += moveW
+
+        '''
+        Each city has exactly one request so the scatter below never hits the same cell twice
+        '''
+        supply = self.state[cities, startStationL, startStationW]
+        possible = supply > 0
+        served = cities[possible]
+        # immediately depart, only the departing station's share of each city's error changes
+        supply = supply[possible]
+        self.state[served, startStationL[possible], startStationW[possible]] = supply - 1
+        self.errorSum[served] += np.abs(self.targetSupply - supply + 1) - np.abs(self.targetSupply - supply)
+        # wait to report changes and arrive
+        self.stateChange[served, endStationL[possible], endStationW[possible]] += 1
+        # Requests failed
+        self.unservice += ~possible
+
+        error = self.errorSum / (self.length * self.width)
+        outReward = self.prevError - error
+        self.prevError = error
+
+        # Create next interest
+        self._generateNextInterest()
+
+        # Check which episodes are complete
+        self.remainingActions -= 1
+        done = self.remainingActions == 0
+        if done.any():
+            self.resetEpisode(done)
+
+        return np.array(self.state), outReward, done, {}
+
+    '''
+    Reset for the next episode the cities selected by the boolean mask done
+    '''
+    def resetEpisode(self, done):
+        # Reset counter
+        self.remainingActions[done] = self.actionsPerEpisode
+        # Reallocate the previous activity elements of the tensor
+        self.state[done] += self.stateChange[done]
+        self.stateChange[done] = 0
+        # Arrivals can touch any station so the error is recomputed once per episode
+        self.errorSum[done] = self._computeErrorSum(done)
+
+        # Save metrics
+        self.metrics.record(unserviceRatio=self.unservice[done]/self.actionsPerEpisode, expense=self.expense[done])
+
+        # reset unservice ratio, but not expense
+        self.unservice[done] = 0
@@ -0,0 +1,111 @@
+from Environments.BikeShare.UniformSimulation.UniformTileBatch import UniformTileBatch
+from stable_baselines.common.vec_env import VecEnv
+from gym import spaces
+import numpy as np
+
+'''
+A vectorized interface for many uniform bikeshare environments, driven by a single UniformTileBatch
+Each sub environment behaves like UniformTileEnv, when one of them is done it is reset in place and
+its final observation is placed in the info dictionary under 'terminal_observation'
+'''
+class UniformTileBatchEnv(VecEnv):
+
+    metadata = {'render.modes': ['human']}
+
+    def __init__(self, numCities, length, width, actionsPerEpisode, targetSupply=5, demand=None, seed=None,
+                 metrics=None):
+        self.name = "UniForm_Tile_Batch_{}x{}x{}".format(numCities, length, width)
+        self.env = UniformTileBatch(numCities, length, width, actionsPerEpisode, targetSupply, demand, seed,
+                                    metrics)
+        super(UniformTileBatchEnv, self).__init__(
+            numCities,
+            spaces.Box(0.0, 1.0, shape=(length, width,), dtype=np.float32),
+            spaces.Discrete(4)
+        )
+        self.actions = None
+
+    '''
+    Reset every environment
+    '''
+    def reset(self):
+        # A sink writing to disk gets every finished episode written out before the next one starts
+        if self.env.metrics.path is not None:
+            self.env.metrics.flush()
+        return self.env.reset()
+
+    '''
+    Store the actions, one per environment, to be taken on step_wait
+    '''
+    def step_async(self, actions):
+        self.actions = actions
+
+    '''
+    Step every environment, resetting those that finished
+    '''
+    def step_wait(self):
+        obs, rewards, dones, _ = self.env.step(self.actions)
+        infos = [{} for _ in range(self.num_envs)]
+        if dones.any():
+            for city in np.flatnonzero(dones):
+                infos[city]['terminal_observation'] = obs[city].copy()
+            self.env.reset(dones)
+            obs[dones] = self.env.state[dones]
+        return obs, rewards, dones, infos
+
+    '''
+    Seed the request stream shared by every environment
+    '''
+    def seed(self, seed=None):
+        return self.env.seed(seed)
+
+    '''
+    Return dimensions of the environments
+    '''
+    def getLW(self):
+        return self.env.length, self.env.width
+
+    '''
+    Return the environment name
+    '''
+    def getName(self):
+        return self.name
+
+    '''
+    A list of the unservice ratios
+    '''
+    def getUnserviceRatios(self):
+        return self.env.getUnserviceRatios()
+
+    '''
+    A list of expenses
+    '''
+    def getExpenses(self):
+        return self.env.getExpenses()
+
+    '''
+    The metrics sink holding the recent history and running aggregates of the metrics
+    '''
+    def getMetrics(self):
+        return self.env.getMetrics()
+
+    def render(self, mode='human'):
+        self.env.render()
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return [getattr(self, method_name)(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def _get_indices(self, indices):
+        if indices is None:
+            return range(self.num_envs)
+        if isinstance(indices, int):
+            return [indices]
+        return indices
+
+    def close(self):
+        self.env.metrics.close()
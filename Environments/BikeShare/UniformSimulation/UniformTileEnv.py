@@ -10,19 +10,34 @@ class UniformTileEnv(gym.Env):
 
     metadata = {'render.modes': ['human']}
 
-    def __init__(self, length, width, actionsPerEpisode):
+    def __init__(self, length, width, actionsPerEpisode, targetSupply=5, demand=None, seed=None,
+                 ticksPerTile=None, requestsPerTick=1, metrics=None, fixedCosts=False, observationMode='copy'):
         self.name = "UniForm_Tile_%sx%s".format({length, width})
-        self.env = UniformTile_core(length, width, actionsPerEpisode)
-        self.action_space = spaces.Discrete(4)
-        self.observation_space = spaces.Box(0.0, 1.0, shape=(6,6,), dtype=np.float32)
+        self.env = UniformTile_core(length, width, actionsPerEpisode, targetSupply, demand, seed,
+                                    ticksPerTile, requestsPerTick, metrics, fixedCosts, observationMode)
+        # One direction per request when several requests are handled each tick
+        if requestsPerTick > 1:
+            self.action_space = spaces.MultiDiscrete([4] * requestsPerTick)
+        else:
+            self.action_space = spaces.Discrete(4)
+        self.observation_space = spaces.Box(0.0, 1.0, shape=(length,width,), dtype=np.float32)
         self.time_steps = 0
 
     '''
     Reset the environment
     '''
     def reset(self):
+        # A sink writing to disk gets every finished episode written out before the next one starts
+        if self.env.metrics.path is not None:
+            self.env.metrics.flush()
         return self.env.reset()
 
+    '''
+    Seed the environment's request stream
+    '''
+    def seed(self, seed=None):
+        return self.env.seed(seed)
+
     '''
     Return dimensions of the environment
     '''
@@ -42,6 +57,24 @@ class UniformTileEnv(gym.Env):
     def getState(self):
         return self.env.getState()
 
+    '''
+    Copy the current observation into out, or return it according to the observation mode
+    '''
+    def getObservation(self, out=None):
+        return self.env.getObservation(out)
+
+    '''
+    Snapshot of the full environment state as bytes
+    '''
+    def get_state(self):
+        return self.env.get_state()
+
+    '''
+    Restore a snapshot taken by get_state
+    '''
+    def set_state(self, blob):
+        self.env.set_state(blob)
+
     '''
     Show the environment
     '''
@@ -69,6 +102,13 @@ class UniformTileEnv(gym.Env):
     def step(self, action):
         return self.env.step(action)
 
+    '''
+    Take a length T array of actions in one call, returns the stacked observations, rewards and done flags
+    With autoReset the environment is reset as soon as an episode ends
+    '''
+    def step_many(self, actions, autoReset=True):
+        return self.env.step_many(actions, autoReset)
+
     '''
     A list of the unservice ratios
     '''
@@ -81,6 +121,12 @@ class UniformTileEnv(gym.Env):
     def getExpenses(self):
         return self.env.getExpenses()
 
+    '''
+    The metrics sink holding the recent history and running aggregates of the metrics
+    '''
+    def getMetrics(self):
+        return self.env.getMetrics()
+
     '''
     Returns the intended next move as a vector for use in a neural network
     '''
@@ -89,4 +135,5 @@ class UniformTileEnv(gym.Env):
 
     def close(self):
         self.reset()
+        self.env.metrics.close()
 
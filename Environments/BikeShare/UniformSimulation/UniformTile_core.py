@@ -1,19 +1,76 @@
+from Environments.BikeShare.DemandStream import UniformDemand
+from Environments.BikeShare.ArrivalCalendar import ArrivalCalendar
+from Environments.BikeShare.MetricsSink import MetricsSink
 import numpy as np
+import pickle
 
 '''
 This simulates an environment of a bike share system as an n x m x 3 grid
 The n and m are the length and width of the grid representing the system
 and then each cell has three values, [supply, previous arrivals, previous deptartures] 
-A uniform distribution is used to determine the start and end locations for transactions
+A uniform distribution is used to determine the start and end locations for transactions, unless another
+DemandStream is given
+The reward is the change in the mean absolute difference between each station's supply and targetSupply
+
+By default bikes that depart are held in stateChange and all arrive at once at the end of an episode.
+When ticksPerTile is given the simulation is event driven instead, every step is one tick of a clock,
+each trip takes ceil(ticksPerTile * manhattan distance) ticks (at least 1) and its bike arrives at the
+destination once the clock passes that time. In this mode requestsPerTick requests are handled as a
+batch on every step and step takes one direction per request.
+
+reset restores the environment in place, the initial supply comes from a cached template and the cost
+matrix is redrawn in place (or kept when fixedCosts is True). observationMode decides what step and
+reset return:
+    'copy'      a new array every call
+    'buffer'    the same preallocated float32 array, overwritten on every call, including by reset, so it
+                must not be used by callers that keep an observation across a reset, such as the
+                stable-baselines vectorized wrappers that keep the final observation of an episode
+    'view'      a read only view of the live state, it changes as the environment steps
+
+The supply lives in a flat array with one extra -1 sentinel slot at the end and state is an L x W view of
+it. neighborTable holds, for every station l * W + w, the flat indices of
+[station, station above, station below, station to the left, station to the right]
+with the sentinel standing in for neighbors off the grid, so neighborhood features are a single gather.
 '''
 class UniformTile_core:
 
-    def __init__(self, length, width, actionsPerEpisode):
+    def __init__(self, length, width, actionsPerEpisode, targetSupply=5, demand=None, seed=None,
+                 ticksPerTile=None, requestsPerTick=1, metrics=None, fixedCosts=False, observationMode='copy'):
         self.length = length
         self.width = width
-
-        # The state matrix/tensor representing the environment  
-        self.state = self._initState(length, width)
+        self.fixedCosts = fixedCosts
+
+        # Event driven settings, bikes in transit wait in a calendar queue until their arrival tick
+        self.ticksPerTile = ticksPerTile
+        self.requestsPerTick = requestsPerTick
+        self.eventDriven = ticksPerTile is not None
+        if self.eventDriven:
+            longestTrip = int(np.ceil(ticksPerTile * (length - 1 + width - 1)))
+            self.calendar = ArrivalCalendar(length * width, max(longestTrip, 1) + 1)
+        else:
+            self.calendar = None
+
+        # The stream of requests, kept across resets so the sequence continues
+        self.demand = demand if demand is not None else UniformDemand(length * width, seed=seed)
+        self.demand.checkStations(length * width)
+
+        # The state matrix/tensor representing the environment, it is only ever updated in place
+        self._stateTemplate = self._initState(length, width)
+        self.paddedState = np.append(self._stateTemplate.ravel(), -1.0)
+        self.state = self.paddedState[:length * width].reshape(length, width)
+        self.neighborTable = self._buildNeighborTable(length, width)
+        # For every station the station a request starts from after each incentive [down, up, right, left]
+        self.moveTable = self._buildMoveTable(length, width)
+        self._moves = self.moveTable.tolist()
+        # Shortest run of requests that step_many handles in a single vectorized pass
+        self.minVectorizedRun = 32
+
+        # Running sum of abs(targetSupply - supply) over every station, updated as stations change
+        self.targetSupply = targetSupply
+        self.errorSum = self._computeErrorSum()
+        self._templateErrorSum = self.errorSum
+
+        self.tickInterest = np.empty((requestsPerTick, 4), dtype=np.int64)
         self.nextInterest = self._generateNextInterest()
 
         # Initializes values for handling episode timing
@@ -22,26 +79,110 @@ class UniformTile_core:
 
         # The matrix to readjust the state upon completion of an episode
         self.stateChange = np.zeros((length, width))
+        self._flatChange = self.stateChange.reshape(-1)
 
         # Initialization of metrics
         self.unservice = 0
         self.expense = 0
 
-        # Records metrics for evaluation
-        self.unserviceRatios = []
-        self.expenses = []
+        # Records metrics for evaluation, kept across resets
+        self.metrics = metrics if metrics is not None else MetricsSink(['unserviceRatio', 'expense'])
 
         # The cost matrix for moving from one station to the next
-        self.costMatrix = self._generateCostMatrix()
+        self.costMatrix = np.empty((4, length, width))
+        self._generateCostMatrix()
 
         self.prevError = 0
 
+        # Preallocated observation buffer and the read only view of the state
+        if observationMode not in ('copy', 'buffer', 'view'):
+            raise Exception("Unknown observation mode {mode}".format(mode=observationMode))
+        self.observationMode = observationMode
+        self._observation = np.empty((length, width), dtype=np.float32)
+        self._stateView = self.state.view()
+        self._stateView.flags.writeable = False
+
     '''
-    Resets the environment
+    Resets the environment in place, without allocating
     '''
     def reset(self):
-        self.__init__(self.length, self.width, self.actionsPerEpisode)
-        return np.array(self.getState()[0])
+        self._resetState()
+        return self.getObservation()
+
+    def _resetState(self):
+        np.copyto(self.state, self._stateTemplate)
+        self.stateChange.fill(0)
+        self.errorSum = self._templateErrorSum
+        if self.eventDriven:
+            self.calendar.clear()
+        self.remainingActions = self.actionsPerEpisode
+        self.unservice = 0
+        self.expense = 0
+        self.prevError = 0
+        if not self.fixedCosts:
+            self._generateCostMatrix()
+        self._generateNextInterest()
+
+    '''
+    The arrays that make up a snapshot, in order
+    '''
+    def _snapshotArrays(self):
+        arrays = [self.state, self.stateChange, self.costMatrix, self.tickInterest]
+        if self.eventDriven:
+            arrays.append(self.calendar.buckets)
+        return arrays
+
+    '''
+    Snapshot of the full simulator state as bytes, including the position in the demand stream, its
+    generator and, in event driven mode, the bikes in transit. Metrics are not part of the snapshot
+
+    Every number is packed into one float64 block followed by the pickled state of the demand stream
+    '''
+    def get_state(self):
+        calendar = [self.calendar.clock, self.calendar.inTransit] if self.eventDriven else []
+        numbers = np.concatenate([array.ravel() for array in self._snapshotArrays()] + [
+            self.nextInterest,
+            [self.errorSum, self.remainingActions, self.unservice, self.expense, self.prevError],
+            calendar
+        ])
+        return numbers.tobytes() + pickle.dumps(self.demand.get_state(), pickle.HIGHEST_PROTOCOL)
+
+    '''
+    Restore a snapshot taken by get_state in place
+    '''
+    def set_state(self, blob):
+        arrays = self._snapshotArrays()
+        count = sum(array.size for array in arrays) + len(self.nextInterest) + 5 + (2 if self.eventDriven else 0)
+        numbers = np.frombuffer(blob, dtype=np.float64, count=count)
+        offset = 0
+        for array in arrays:
+            array.reshape(-1)[:] = numbers[offset:offset + array.size]
+            offset += array.size
+        scalars = numbers[offset:].tolist()
+        interestLength = len(self.nextInterest)
+        self.nextInterest = [int(value) for value in scalars[:interestLength]]
+        self.errorSum, remainingActions, unservice, self.expense, self.prevError = scalars[interestLength:interestLength + 5]
+        self.remainingActions = int(remainingActions)
+        self.unservice = int(unservice)
+        if self.eventDriven:
+            self.calendar.clock = int(scalars[-2])
+            self.calendar.inTransit = int(scalars[-1])
+        self.demand.set_state(pickle.loads(blob[count * 8:]))
+
+    '''
+    Return the observation of the current state according to observationMode
+    When out is given the state is copied into it instead
+    '''
+    def getObservation(self, out=None):
+        if out is not None:
+            np.copyto(out, self.state)
+            return out
+        if self.observationMode == 'buffer':
+            np.copyto(self._observation, self.state)
+            return self._observation
+        if self.observationMode == 'view':
+            return self._stateView
+        return np.array(self.state)
 
     '''
     Initializes the state matrix
@@ -53,37 +194,77 @@ class UniformTile_core:
     ]
     '''
     def _initState(self, length, width):
-        stateMatrix = np.zeros((length, width))
-        for l in range(0, int(length/2)):
-            for w in range(width):
-                stateMatrix[l][w] = 2
-        for l in range(int(length/2), length):
-            for w in range(width):
-                stateMatrix[l][w] = 10
+        stateMatrix = np.full((length, width), 10.0)
+        stateMatrix[:int(length/2)] = 2
         return stateMatrix
 
+    '''
+    For every station the flat indices of [station, above, below, left, right], length * width when off the grid
+    '''
+    @staticmethod
+    def _buildNeighborTable(length, width):
+        l, w = np.divmod(np.arange(length * width), width)
+        stations = l * width + w
+        sentinel = length * width
+        return np.stack([
+            stations,
+            np.where(l > 0, stations - width, sentinel),
+            np.where(l < length - 1, stations + width, sentinel),
+            np.where(w > 0, stations - 1, sentinel),
+            np.where(w < width - 1, stations + 1, sentinel)
+        ], axis=1)
+
+    '''
+    For every station the flat index it moves to in the directions [down, up, right, left], itself when the
+    move would leave the grid
+    '''
+    @staticmethod
+    def _buildMoveTable(length, width):
+        l, w = np.divmod(np.arange(length * width), width)
+        stations = l * width + w
+        return np.stack([
+            np.where(l < length - 1, stations + width, stations),
+            np.where(l > 0, stations - width, stations),
+            np.where(w < width - 1, stations + 1, stations),
+            np.where(w > 0, stations - 1, stations)
+        ], axis=1)
+
+    '''
+    Full sum of abs(targetSupply - supply) over every station
+    '''
+    def _computeErrorSum(self):
+        return float(np.abs(self.targetSupply - self.state).sum())
+
     '''
     nextMove encoded as [start station L, start station W, end station L, end station W]
+    In event driven mode every request of the next tick is held in tickInterest and nextInterest is the first
     '''
     def _generateNextInterest(self):
-        # randint uniform distribution
-        startLInd = np.random.randint(self.length)
-        startWInd = np.random.randint(self.width)
-        targetLInd = np.random.randint(self.length)
-        targetWInd = np.random.randint(self.width)
+        if self.eventDriven:
+            origins, destinations = self.demand.take(self.requestsPerTick)
+            self.tickInterest[:, 0], self.tickInterest[:, 1] = np.divmod(origins, self.width)
+            self.tickInterest[:, 2], self.tickInterest[:, 3] = np.divmod(destinations, self.width)
+            self.nextInterest = self.tickInterest[0].tolist()
+            return self.nextInterest
+        # Stations are numbered l * width + w in the demand stream
+        origin, destination = self.demand.next()
+        startLInd, startWInd = divmod(origin, self.width)
+        targetLInd, targetWInd = divmod(destination, self.width)
         self.nextInterest = [startLInd, startWInd, targetLInd, targetWInd]
         return self.nextInterest
 
     '''
-    Builds cost matrix for moving from one station to another
+    Reseed the demand stream
+    '''
+    def seed(self, seed=None):
+        return self.demand.seed(seed)
+
+    '''
+    Draws the cost matrix for moving from one station to another in place
     '''
     def _generateCostMatrix(self):
-        outMatrix = np.zeros((4,self.length, self.width))
-        for d in [0,1,2,3]:
-            for l in range(self.length):
-                for w in range(self.width):
-                    outMatrix[d][l][w] = np.random.randint(5)
-        return outMatrix
+        self.costMatrix[:] = self.demand.rng.integers(5, size=self.costMatrix.shape)
+        return self.costMatrix
 
     '''
     Returns the state and next next interest
@@ -100,20 +281,32 @@ class UniformTile_core:
         return self.state[lInd][wInd]
 
     '''
-    Return state of a station and it surrounding stations
+    Return state of a station and it surrounding stations, in the order station, above, below, left, right
+    leaving out the neighbors that are off the grid
     '''
     def getSubRegion(self, lInd, wInd):
-        out = []
-        out.append(self.state[lInd][wInd])
-        if lInd > 0:
-            out.append(self.state[lInd-1])
-        if lInd < self.length-1:
-            out.append(self.state[lInd+1])
-        if wInd > 0:
-            out.append(self.state[wInd-1])
-        if wInd < self.width-1:
-            out.append(self.state[wInd+1])
-        return out
+        neighbors = self.neighborTable[lInd * self.width + wInd]
+        return self.paddedState[neighbors[neighbors < self.length * self.width]]
+
+    '''
+    Return the neighborhood features [station, above, below, left, right] of the given flat stations
+    (l * width + w), or of every station, with -1 for neighbors off the grid
+    '''
+    def getNeighborhoods(self, stations=None):
+        if stations is None:
+            return self.paddedState[self.neighborTable]
+        return self.paddedState[self.neighborTable[stations]]
+
+    '''
+    Return the neighborhood features of the start station of every pending request
+    one row per request of the tick in event driven mode, otherwise a single row
+    '''
+    def getRequestNeighborhoods(self):
+        if self.eventDriven:
+            origins = self.tickInterest[:, 0] * self.width + self.tickInterest[:, 1]
+        else:
+            origins = [self.nextInterest[0] * self.width + self.nextInterest[1]]
+        return self.paddedState[self.neighborTable[origins]]
 
     '''
     Print to screen the current state
@@ -127,16 +320,22 @@ class UniformTile_core:
         print(out)
 
     '''
-    Return a lsit of unservice ratios
+    Return the most recent unservice ratios, oldest first
     '''
     def getUnserviceRatios(self):
-        return self.unserviceRatios
+        return self.metrics['unserviceRatio'].values()
 
     '''
-    Return a list of expenses
+    Return the most recent expenses, oldest first
     '''
     def getExpenses(self):
-        return self.expenses
+        return self.metrics['expense'].values()
+
+    '''
+    Return the metrics sink, which also holds the running aggregates of every episode
+    '''
+    def getMetrics(self):
+        return self.metrics
 
     '''
     dir 
@@ -146,40 +345,140 @@ class UniformTile_core:
     3 left
     '''
     def step(self, bestDir):
+        if self.eventDriven:
+            outReward, done = self._stepTick(bestDir)
+        else:
+            outReward, done = self._stepRequest(bestDir)
+        return self.getObservation(), outReward, done, {}
+
+    '''
+    Take a length T array of actions (T x requestsPerTick in event driven mode) in one call and return the
+    stacked observations (T x L x W float32), rewards and done flags, the same as calling step T times
+
+    With autoReset the environment is reset whenever an episode ends, as a vectorized environment would,
+    so the observation of a done step is the first observation of the next episode
+    '''
+    def step_many(self, actions, autoReset=True):
+        actions = np.asarray(actions)
+        steps = len(actions)
+        observations = np.empty((steps, self.length, self.width), dtype=np.float32)
+        rewards = np.empty(steps)
+        dones = np.zeros(steps, dtype=bool)
+
+        if self.eventDriven:
+            for t, action in enumerate(actions.tolist()):
+                rewards[t], dones[t] = self._stepTick(action)
+                if dones[t] and autoReset:
+                    self._resetState()
+                observations[t] = self.state
+            return observations, rewards, dones
+
+        # Departures only lower the supply until the episode ends, so each episode is handled in one pass
+        # unless it is too short to pay for the vectorized setup
+        t = 0
+        while t < steps:
+            count = min(steps - t, self.remainingActions)
+            if count >= self.minVectorizedRun:
+                flatObservations = observations[t:t + count].reshape(count, -1)
+                rewards[t:t + count] = self._stepRequests(actions[t:t + count], flatObservations)
+            else:
+                for i in range(t, t + count):
+                    rewards[i] = self._stepRequest(int(actions[i]))[0]
+                    observations[i] = self.state
+            t += count
+            if self.remainingActions == self.actionsPerEpisode:
+                dones[t - 1] = True
+                if autoReset:
+                    self._resetState()
+                observations[t - 1] = self.state
+        return observations, rewards, dones
+
+    '''
+    Handle a run of requests that stays within one episode in a single vectorized pass, writing the supply
+    after every request into the rows of observations and returning the rewards
+
+    A request is served when fewer earlier requests of the run left from its start station than the station
+    had bikes at the start of the run, since arrivals are held back until the episode ends
+    '''
+    def _stepRequests(self, actions, observations):
+        count = len(actions)
+        stations = self.length * self.width
+        supply = self.paddedState[:stations]
+
+        # The pending request and the next count, the last of which becomes the new pending request
+        origins, destinations = self.demand.take(count)
+        origins = np.concatenate([[self.nextInterest[0] * self.width + self.nextInterest[1]], origins])
+        destinations = np.concatenate([[self.nextInterest[2] * self.width + self.nextInterest[3]], destinations])
+        self.nextInterest = list(divmod(int(origins[-1]), self.width) + divmod(int(destinations[-1]), self.width))
+        origins = origins[:-1]
+        destinations = destinations[:-1]
+
+        # Move the start of every request with a valid incentive
+        moved = (actions >= 0) & (actions < 4)
+        starts = np.where(moved, self.moveTable[origins, np.where(moved, actions, 0)], origins)
+
+        # Rank each request among the earlier requests from the same station
+        order = np.argsort(starts, kind='stable')
+        sortedStarts = starts[order]
+        rank = np.empty(count, dtype=np.int64)
+        rank[order] = np.arange(count) - np.searchsorted(sortedStarts, sortedStarts)
+        before = supply[starts] - rank
+        granted = before > 0
+        self.unservice += count - int(granted.sum())
+
+        # Supply after every request, the departures so far are counted up in observations itself
+        served = np.flatnonzero(granted)
+        observations.fill(0)
+        observations[served, starts[served]] = 1
+        np.cumsum(observations, axis=0, out=observations)
+        np.subtract(supply, observations, out=observations)
+
+        # Running error, in the same order of additions as step
+        change = np.where(granted, np.abs(self.targetSupply - before + 1) - np.abs(self.targetSupply - before), 0)
+        errorSums = np.cumsum(np.concatenate([[self.errorSum], change]))[1:]
+        errors = errorSums / stations
+        rewards = np.concatenate([[self.prevError], errors[:-1]]) - errors
+        self.errorSum = float(errorSums[-1])
+        self.prevError = float(errors[-1])
+
+        supply -= np.bincount(starts[served], minlength=stations)
+        self._flatChange += np.bincount(destinations[granted], minlength=stations)
+
+        self.remainingActions -= count
+        if self.remainingActions == 0:
+            self.resetEpisode()
+        return rewards
 
-        dir = [0,1,2,3]
+    '''
+    A single request, returns (reward, done)
+    '''
+    def _stepRequest(self, bestDir):
         # Prepare for movement
-        startStationL = self.nextInterest[0]
-        startStationW = self.nextInterest[1]
-        endStationL = self.nextInterest[2]
-        endStationW = self.nextInterest[3]
+        startStationL, startStationW, endStationL, endStationW = self.nextInterest
+        startStation = startStationL * self.width + startStationW
 
         stepExpense = 0
 
         '''
         Determine if any of the given incentives is enough to change starting location
+        moves leaving the grid keep the original station
         '''
-        if self.valid(startStationL, startStationW, bestDir):
-            if bestDir == 0:
-                startStationL += 1
-            elif bestDir == 1:
-                startStationL -= 1
-            elif bestDir == 2:
-                startStationW += 1
-            elif bestDir == 3:
-                startStationW -= 1
+        if 0 <= bestDir < 4:
+            startStation = self._moves[startStation][bestDir]
         '''
         '''
-        if self.possible(startStationL, startStationW):
-            # immediately depart
-            self.state[startStationL][startStationW] -= 1
+        supply = self.paddedState.item(startStation)
+        if supply > 0:
+            # immediately depart, only this station's share of the error changes
+            self.paddedState[startStation] = supply - 1
+            self.errorSum += abs(self.targetSupply - supply + 1) - abs(self.targetSupply - supply)
 
             # wait to report changes and arrive
-            self.stateChange[endStationL][endStationW] += 1
+            self._flatChange[endStationL * self.width + endStationW] += 1
         else:
             # Request failed
             self.unservice += 1
-        error = (abs(np.full((6,6),5) - self.state)).mean(axis=None)
+        error = self.errorSum / (self.length * self.width)
         outReward = self.prevError - error
 
         self.prevError = error
@@ -193,8 +492,77 @@ class UniformTile_core:
             self.resetEpisode()
         self.expense += stepExpense
 
-        state = self.getState()[0]
-        return np.array(state), outReward, done, {}
+        return outReward, done
+
+    '''
+    Event driven step, bestDir holds one direction per request of the tick (or one for all of them)
+    Requests are granted in order, a station serves as many of them as it has bikes, returns (reward, done)
+    '''
+    def _stepTick(self, bestDir):
+        interest = self.tickInterest
+        actions = np.broadcast_to(np.asarray(bestDir), (self.requestsPerTick,))
+        supply = self.state.reshape(-1)
+
+        # Move the start of every request whose incentive points to a valid station
+        startStationL = interest[:, 0] + ((actions == 0) & (interest[:, 0] < self.length-1)) \
+            - ((actions == 1) & (interest[:, 0] > 0))
+        startStationW = interest[:, 1] + ((actions == 2) & (interest[:, 1] < self.width-1)) \
+            - ((actions == 3) & (interest[:, 1] > 0))
+        origins = startStationL * self.width + startStationW
+        destinations = interest[:, 2] * self.width + interest[:, 3]
+
+        # Rank each request among the earlier requests from the same station
+        order = np.argsort(origins, kind='stable')
+        sortedOrigins = origins[order]
+        rank = np.arange(self.requestsPerTick) - np.searchsorted(sortedOrigins, sortedOrigins)
+        granted = np.empty(self.requestsPerTick, dtype=bool)
+        granted[order] = rank < supply[sortedOrigins]
+        self.unservice += self.requestsPerTick - int(granted.sum())
+
+        # immediately depart
+        stations, departures = np.unique(origins[granted], return_counts=True)
+        self._applyChange(supply, stations, -departures)
+
+        # queue the arrivals
+        travelTimes = np.abs(startStationL - interest[:, 2]) + np.abs(startStationW - interest[:, 3])
+        travelTimes = np.maximum(np.ceil(travelTimes * self.ticksPerTile), 1).astype(np.int64)
+        self.calendar.schedule(destinations[granted], travelTimes[granted])
+
+        # advance the clock and dock every bike that is due
+        stations, arrivals = self.calendar.advance()
+        self._applyChange(supply, stations, arrivals)
+
+        error = self.errorSum / (self.length * self.width)
+        outReward = self.prevError - error
+        self.prevError = error
+
+        # Create next interest
+        self._generateNextInterest()
+        done = False
+        # Check if the episode is complete
+        self.remainingActions -= 1
+        if self.remainingActions == 0:
+            done = True
+            self.resetEpisode()
+
+        return outReward, done
+
+    '''
+    Add change to the supply of the given (flat) stations, keeping the error sum up to date
+    '''
+    def _applyChange(self, supply, stations, change):
+        before = supply[stations]
+        after = before + change
+        supply[stations] = after
+        self.errorSum += float(np.abs(self.targetSupply - after).sum() - np.abs(self.targetSupply - before).sum())
+
+    '''
+    Number of bikes currently in transit
+    '''
+    def getInTransit(self):
+        if self.eventDriven:
+            return self.calendar.inTransit
+        return int(self.stateChange.sum())
 
     '''
     Check that a station has a bike to give up
@@ -208,13 +576,17 @@ class UniformTile_core:
     def resetEpisode(self):
         # Reset counter
         self.remainingActions = self.actionsPerEpisode
-        # Reallocate the previous acitivity elements of the matrix
-        self.state = np.add(self.state, self.stateChange)
-        self.stateChange = np.zeros((self.length, self.width))
+        # Event driven arrivals have already been applied as they came due
+        if not self.eventDriven:
+            # Reallocate the previous acitivity elements of the matrix
+            self.state += self.stateChange
+            self.stateChange.fill(0)
+            # Arrivals can touch any station so the error is recomputed once per episode
+            self.errorSum = self._computeErrorSum()
 
         # Save metrics
-        self.unserviceRatios.append(self.unservice/self.actionsPerEpisode)
-        self.expenses.append(self.expense)
+        self.metrics.record(unserviceRatio=self.unservice/(self.actionsPerEpisode * self.requestsPerTick),
+                            expense=self.expense)
 
         # reset unservice ratio, but not expense
         self.unservice = 0
@@ -238,25 +610,5 @@ class UniformTile_core:
     Redefine the next move as a vector, useful for neural networks
     '''
     def getNextMoveAsVector(self):
-        lInd = self.nextInterest[0]
-        wInd = self.nextInterest[1]
-        out = []
-        out.append(self.state[lInd][wInd])
-        if lInd > 0:
-            out.append(self.state[lInd-1][wInd])
-        else:
-            out.append(-1.0)
-        if lInd < self.length-1:
-            out.append(self.state[lInd+1][wInd])
-        else:
-            out.append(-1.0)
-        if wInd > 0:
-            out.append(self.state[lInd][wInd-1])
-        else:
-            out.append(-1.0)
-        if wInd < self.width-1:
-            out.append(self.state[lInd][wInd+1])
-        else:
-            out.append(-1.0)
-        out = np.array([out])
-        return out
\ No newline at end of file
+        station = self.nextInterest[0] * self.width + self.nextInterest[1]
+        return self.paddedState[self.neighborTable[station]][np.newaxis]
@@ -1,5 +1,5 @@
 import numpy as np
-import random
+import pickle
 import gym
 import math
 
@@ -9,20 +9,75 @@ from gym import spaces
 
 class AgentSearchEnv(gym.Env):
     '''
+    The state is a single width x length float32 grid indexed [x][y] that lives as long as the environment,
+    only the cells of the mouse and cheese are written on every step
+
+    observationMode 'copy' returns a new array from step and reset, 'view' a read only view of the grid
     '''
     metadata = {'render.modes': ['human']}
 
-    def __init__(self):
+    def __init__(self, length=10, width=10, observationMode='copy'):
         super(AgentSearchEnv, self).__init__()
-        self.mouseX = random.randint(0,9)
-        self.mouseY = random.randint(0,9)
-        self.cheeseX = random.randint(0,9)
-        self.cheeseY = random.randint(0,9)
+        if observationMode not in ('copy', 'view'):
+            raise Exception("Unknown observation mode {mode}".format(mode=observationMode))
+        self.length = length
+        self.width = width
+        # The generator for the random starting positions
+        self.rng = np.random.default_rng()
+        self.mouseX, self.mouseY, self.cheeseX, self.cheeseY = self.rng.integers(0, [width, length, width, length]).tolist()
         self.prevDist = 0
         self.action_space =spaces.Discrete(4)
-        self.observation_space = spaces.Box(-np.inf, np.inf, shape=(10,10,), dtype=np.float32)
+        self.observation_space = spaces.Box(-np.inf, np.inf, shape=(width,length,), dtype=np.float32)
         self.time_steps = 0
 
+        self.state = np.zeros((width, length), dtype=np.float32)
+        self._draw()
+        self.observationMode = observationMode
+        self._stateView = self.state.view()
+        self._stateView.flags.writeable = False
+
+    def seed(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+        return [seed]
+
+    '''
+    Snapshot of the full environment state as bytes, including the generator used by reset
+    '''
+    def get_state(self):
+        return pickle.dumps((
+            self.mouseX, self.mouseY, self.cheeseX, self.cheeseY, self.prevDist, self.time_steps,
+            self.rng.bit_generator.state
+        ), pickle.HIGHEST_PROTOCOL)
+
+    '''
+    Restore a snapshot taken by get_state
+    '''
+    def set_state(self, blob):
+        self._clear()
+        (self.mouseX, self.mouseY, self.cheeseX, self.cheeseY, self.prevDist, self.time_steps,
+         rngState) = pickle.loads(blob)
+        self._draw()
+        self.rng.bit_generator.state = rngState
+
+    '''
+    Observation of the grid according to observationMode, copied into out when it is given
+    '''
+    def getObservation(self, out=None):
+        if out is not None:
+            np.copyto(out, self.state)
+            return out
+        if self.observationMode == 'view':
+            return self._stateView
+        return self.state.copy()
+
+    def _clear(self):
+        self.state[self.mouseX, self.mouseY] = 0
+        self.state[self.cheeseX, self.cheeseY] = 0
+
+    def _draw(self):
+        self.state[self.mouseX, self.mouseY] = 1
+        self.state[self.cheeseX, self.cheeseY] = 2
+
     def getActionSpace(self):
         return self.action_space
 
@@ -35,6 +90,7 @@ class AgentSearchEnv(gym.Env):
     def step(self, action):
         done =False
         self.time_steps += 1
+        self.state[self.mouseX, self.mouseY] = 0
         move = action
         # Up
         if move == 0:
@@ -46,8 +102,8 @@ class AgentSearchEnv(gym.Env):
         # Down
         if move == 1:
             self.mouseY += 1
-            if self.mouseY > 9:
-                self.mouseY = 9
+            if self.mouseY > self.length - 1:
+                self.mouseY = self.length - 1
                 done = True
                 reward = -1
         # Left
@@ -60,8 +116,8 @@ class AgentSearchEnv(gym.Env):
         # Right
         if move == 3:
             self.mouseX += 1
-            if self.mouseX > 9:
-                self.mouseX = 9
+            if self.mouseX > self.width - 1:
+                self.mouseX = self.width - 1
                 done = True
                 reward = -1
         if not done:
@@ -72,23 +128,16 @@ class AgentSearchEnv(gym.Env):
                 done = True
                 reward = 10
 
-        state = list(np.zeros((10,10)))
-        state[self.mouseX][self.mouseY] = 1
-        state[self.cheeseX][self.cheeseY] = 2
+        self._draw()
 
-        return np.array(state, dtype=np.float32), reward, done, {}
+        return self.getObservation(), reward, done, {}
 
     def reset(self):
-        self.mouseX = random.randint(0,9)
-        self.mouseY = random.randint(0,9)
-        self.cheeseX = random.randint(0,9)
-        self.cheeseY = random.randint(0,9)
-
-        state = list(np.zeros((10,10)))
-        state[self.mouseX][self.mouseY] = 1
-        state[self.cheeseX][self.cheeseY] = 2
+        self._clear()
+        self.mouseX, self.mouseY, self.cheeseX, self.cheeseY = self.rng.integers(0, [self.width, self.length, self.width, self.length]).tolist()
+        self._draw()
 
-        return np.array(state, dtype=np.float32)
+        return self.getObservation()
 
     def render(self, mode='human'):
         print(self.mouseX)
@@ -2,11 +2,13 @@ from Environments.MouseAndCheese.token import EnvToken
 
 
 class Cheese(EnvToken):
+    __slots__ = ()
 
-    def __init__(self, startX, startY):
+    def __init__(self, startX, startY, registry=None):
         '''
 
         :param startX: initial X location cheese
         :param startY: initial Y location of cheese
+        :param registry: TokenRegistry to store the cheese in, a new one when None
         '''
-        super().__init__(startX, startY, 2, "Cheese")
\ No newline at end of file
+        super().__init__(startX, startY, 2, "Cheese", registry)
\ No newline at end of file
@@ -1,11 +1,13 @@
 from Environments.MouseAndCheese.token import EnvToken
 
 class Mouse(EnvToken):
+    __slots__ = ()
 
-    def __init__(self, startX, startY):
+    def __init__(self, startX, startY, registry=None):
         '''
 
         :param startX: initial X location mouse
         :param startY: initial Y location of mouse
+        :param registry: TokenRegistry to store the mouse in, a new one when None
         '''
-        super().__init__(startX, startY, 1, "Mouse")
\ No newline at end of file
+        super().__init__(startX, startY, 1, "Mouse", registry)
\ No newline at end of file
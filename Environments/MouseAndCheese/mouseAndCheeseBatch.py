@@ -0,0 +1,257 @@
+from Environments.MouseAndCheese.mouseAndCheeseMDP import exportMDP
+import numpy as np
+
+
+class MouseAndCheeseBatch:
+    '''
+    Runs numEnvs mouse and cheese episodes at once, the mouse and cheese of every episode are held as rows of
+    integer (x, y) arrays and every step moves all of the mice with masked vector arithmetic
+
+    The rules are those of MouseAndCheeseEnv, actions are 0 up, 1 down, 2 left, 3 right, a move that would
+    leave the map does nothing, reaching the cheese gives 10 and ends the episode, otherwise the reward is 1
+    when the mouse got closer to the cheese and -1 when it did not. With autoReset an episode that ends is
+    restarted from new random positions straight away, so its observation is the first of the next episode
+
+    encoding picks the observation
+        'grid'      (N, length, width) float32 maps as in MouseAndCheeseEnv, 1 for the mouse and 2 for the cheese,
+                    the mouse is drawn over the cheese when they share a cell
+        'coords'    (N, 1, 4) float32 [mouseX, mouseY, cheeseX, cheeseY] as in MouseAndCheeseEnvSimplified
+    '''
+
+    def __init__(self, numEnvs, length=10, width=10, encoding='grid', autoReset=True, seed=None,
+                 observationMode='copy'):
+        '''
+        Initialize the environments with random positions
+
+        :param numEnvs: number of episodes run at once
+        :param length: length (vertical, y) of every map
+        :param width: width (horizontal, x) of every map
+        :param encoding: 'grid' or 'coords'
+        :param autoReset: whether episodes that end are restarted inside step
+        :param seed: seed for the generator of the starting positions
+        :param observationMode: 'copy' returns a new array every call, 'view' a read only view of the
+                                observation buffer, which changes as the environments step
+        '''
+        if encoding not in ('grid', 'coords'):
+            raise Exception("Unknown encoding {encoding}".format(encoding=encoding))
+        if observationMode not in ('copy', 'view'):
+            raise Exception("Unknown observation mode {mode}".format(mode=observationMode))
+        self.numEnvs = numEnvs
+        self.length = length
+        self.width = width
+        self.encoding = encoding
+        self.autoReset = autoReset
+        self.observationMode = observationMode
+        self.rng = np.random.default_rng(seed)
+
+        # (x, y) of every mouse and cheese
+        self.mouse = np.zeros((numEnvs, 2), dtype=np.int64)
+        self.cheese = np.zeros((numEnvs, 2), dtype=np.int64)
+        # The (x, y) offset of each action, up, down, left, right, and the largest x and y on the map
+        self.moves = np.array([[0, -1], [0, 1], [-1, 0], [1, 0]])
+        self.upper = np.array([width - 1, length - 1])
+        self._envs = np.arange(numEnvs)
+
+        if encoding == 'grid':
+            self._observation = np.zeros((numEnvs, length, width), dtype=np.float32)
+        else:
+            self._observation = np.zeros((numEnvs, 1, 4), dtype=np.float32)
+        self._observationView = self._observation.view()
+        self._observationView.flags.writeable = False
+
+        self.reset()
+
+    def seed(self, seed=None):
+        '''
+        Seed the random starting positions
+
+        :param seed: seed for the generator
+        :return: [seed]
+        '''
+        self.rng = np.random.default_rng(seed)
+        return [seed]
+
+    def reset(self, envs=None):
+        '''
+        Restart episodes from random positions
+
+        :param envs: boolean mask or indices of the episodes to restart, every episode when None
+        :return: observation of every episode
+        '''
+        if envs is None:
+            envs = self._envs
+        envs = self._envs[envs]
+        self._clear(envs)
+        self.mouse[envs] = self.rng.integers(0, self.upper + 1, size=(len(envs), 2))
+        self.cheese[envs] = self.rng.integers(0, self.upper + 1, size=(len(envs), 2))
+        self._draw(envs)
+        return self.getObservation()
+
+    def setPositions(self, mouse, cheese, envs=None):
+        '''
+        Place the mice and cheese of some episodes
+
+        :param mouse: (k, 2) array of mouse (x, y), or a single (x, y) for all of them
+        :param cheese: (k, 2) array of cheese (x, y), or a single (x, y) for all of them
+        :param envs: boolean mask or indices of the episodes, every episode when None
+        :return: observation of every episode
+        '''
+        if envs is None:
+            envs = self._envs
+        envs = self._envs[envs]
+        mouse = np.broadcast_to(mouse, (len(envs), 2))
+        cheese = np.broadcast_to(cheese, (len(envs), 2))
+        if (mouse < 0).any() or (mouse > self.upper).any() or (cheese < 0).any() or (cheese > self.upper).any():
+            raise Exception("Positions are out of bounds for map {width}x{length}".format(
+                width=self.width, length=self.length))
+        self._clear(envs)
+        self.mouse[envs] = mouse
+        self.cheese[envs] = cheese
+        self._draw(envs)
+        return self.getObservation()
+
+    def getObservation(self):
+        '''
+        Observation of every episode according to observationMode
+
+        :return: (N, length, width) or (N, 1, 4) float32 array
+        '''
+        if self.observationMode == 'view':
+            return self._observationView
+        return self._observation.copy()
+
+    def exportMDP(self):
+        '''
+        The exact transitions and rewards of a single episode as tables, see mouseAndCheeseMDP
+
+        :return: nextState (S x 4), reward (S x 4), done (S x 4), terminal (S)
+        '''
+        return exportMDP(self.length, self.width)
+
+    def getStateIndices(self):
+        '''
+        :return: index of the current state of every episode in the tables of exportMDP
+        '''
+        return np.ravel_multi_index((self.mouse[:, 0], self.mouse[:, 1], self.cheese[:, 0], self.cheese[:, 1]),
+                                    (self.width, self.length, self.width, self.length))
+
+    def getMousePositions(self):
+        return self.mouse.copy()
+
+    def getCheesePositions(self):
+        return self.cheese.copy()
+
+    def step(self, actions):
+        '''
+        Move every mouse
+
+        :param actions: one action per episode, any value outside 0-3 leaves the mouse where it is
+        :return: observations, rewards (N,), dones (N,), {}
+        '''
+        actions = np.asarray(actions)
+        previous = self._squaredDistance()
+        if self.encoding == 'grid':
+            self._clearMice(self._envs)
+
+        valid = (actions >= 0) & (actions < 4)
+        offsets = self.moves[np.where(valid, actions, 0)] * valid[:, np.newaxis]
+        self.mouse += offsets
+        np.clip(self.mouse, 0, self.upper, out=self.mouse)
+
+        current = self._squaredDistance()
+        dones = current == 0
+        rewards = np.where(dones, 10.0, np.where(current < previous, 1.0, -1.0))
+
+        if self.autoReset and dones.any():
+            ended = self._envs[dones]
+            self._clear(ended)
+            self.mouse[ended] = self.rng.integers(0, self.upper + 1, size=(len(ended), 2))
+            self.cheese[ended] = self.rng.integers(0, self.upper + 1, size=(len(ended), 2))
+            self._draw(ended)
+        self._draw(self._envs)
+        return self.getObservation(), rewards, dones, {}
+
+    def getStates(self, envs=None):
+        '''
+        :param envs: boolean mask or indices of the episodes, every episode when None
+        :return: (k, 4) integer [mouseX, mouseY, cheeseX, cheeseY] of the episodes
+        '''
+        if envs is None:
+            envs = self._envs
+        return np.hstack([self.mouse[envs], self.cheese[envs]])
+
+    def runEpisodes(self, act, maxSteps, learn=None):
+        '''
+        Play every episode from its current positions until it reaches the cheese or maxSteps steps were taken,
+        only the episodes still running are given actions, the others stay where they are
+
+        :param act: function (games, states) returning the actions of the running episodes, games are their
+                    indices and states their (k, 4) [mouseX, mouseY, cheeseX, cheeseY]
+        :param maxSteps: most steps an episode takes
+        :param learn: function (games, states, actions, rewards, newStates, dones) called after every step with
+                      the transitions of the episodes that were running, or None
+        :return: steps (N,) taken to reach the cheese counting the first step as 1, maxSteps for the episodes
+                 that did not, success (N,) whether each episode reached the cheese and totals (N,) the sum of
+                 the rewards of each episode
+        '''
+        if self.autoReset:
+            raise Exception("runEpisodes needs an environment without autoReset")
+        steps = np.full(self.numEnvs, maxSteps)
+        totals = np.zeros(self.numEnvs)
+        running = np.ones(self.numEnvs, dtype=bool)
+        actions = np.full(self.numEnvs, -1)
+        for step in range(1, maxSteps + 1):
+            games = np.flatnonzero(running)
+            states = self.getStates(games)
+            actions[:] = -1
+            actions[games] = act(games, states)
+            _, rewards, dones, _ = self.step(actions)
+            rewards = rewards[games]
+            dones = dones[games]
+            if learn is not None:
+                learn(games, states, actions[games], rewards, self.getStates(games), dones)
+            totals[games] += rewards
+            steps[games[dones]] = step
+            running[games[dones]] = False
+            if not running.any():
+                break
+        return steps, ~running, totals
+
+    def render(self, env=0):
+        '''
+        Print to console one of the episodes
+
+        :param env: index of the episode
+        '''
+        print(self.mouse[env])
+        print(self.cheese[env])
+        if self.encoding == 'grid':
+            for row in self._observation[env]:
+                print(row)
+        print()
+
+    def _squaredDistance(self):
+        difference = self.mouse - self.cheese
+        return (difference * difference).sum(axis=1)
+
+    def _clearMice(self, envs):
+        self._observation[envs, self.mouse[envs, 1], self.mouse[envs, 0]] = 0
+
+    def _clear(self, envs):
+        '''
+        Remove the mice and cheese of the given episodes from the grid
+        '''
+        if self.encoding == 'grid':
+            self._observation[envs, self.cheese[envs, 1], self.cheese[envs, 0]] = 0
+            self._clearMice(envs)
+
+    def _draw(self, envs):
+        '''
+        Write the mice and cheese of the given episodes into the observation buffer
+        '''
+        if self.encoding == 'grid':
+            self._observation[envs, self.cheese[envs, 1], self.cheese[envs, 0]] = 2
+            self._observation[envs, self.mouse[envs, 1], self.mouse[envs, 0]] = 1
+        else:
+            self._observation[envs, 0, :2] = self.mouse[envs]
+            self._observation[envs, 0, 2:] = self.cheese[envs]
@@ -1,18 +1,24 @@
 from Environments.MouseAndCheese.mouse import Mouse
 from Environments.MouseAndCheese.cheese import Cheese
+from Environments.MouseAndCheese.tokenRegistry import TokenRegistry
+from Environments.MouseAndCheese.mouseAndCheeseMDP import exportMDP
 import math
 from gym import spaces
 import numpy as np
 import gym
-import random
+import pickle
 
 class MouseAndCheeseEnv(gym.Env):
     '''
     Environment where there is a mouse that wants to get to cheese
+
+    The map is a single length x width float32 array indexed [y][x] that lives as long as the environment,
+    steps and resets only write the cells that change
     '''
     metadata = {'render.modes': ['human']}
     
-    def __init__(self, length, width, mouseStartX, mouseStartY, cheeseStartX, cheeseStartY):
+    def __init__(self, length, width, mouseStartX, mouseStartY, cheeseStartX, cheeseStartY,
+                 observationMode='copy'):
         '''
         Initialize the environment
 
@@ -22,22 +28,70 @@ class MouseAndCheeseEnv(gym.Env):
         :param mouseStartY: Y co-ordinate starting position of the mouse
         :param cheeseStartX: X co-ordinate starting position of the cheese
         :param cheeseStartY: Y co-ordinate starting position of the cheese
+        :param observationMode: 'copy' step and reset return a new array, 'view' they return a read only view
+                                of the map that changes as the environment steps
         '''
+        if observationMode not in ('copy', 'view'):
+            raise Exception("Unknown observation mode {mode}".format(mode=observationMode))
         super(MouseAndCheeseEnv, self).__init__()
         self.map = self.createMap(length, width)
         self.length = length
         self.width = width
-        self.mouse = Mouse(mouseStartX, mouseStartY)
-        self.cheese = Cheese(cheeseStartX, cheeseStartY)
+        # The mouse and cheese share one token registry
+        self.tokens = TokenRegistry()
+        self.mouse = Mouse(mouseStartX, mouseStartY, self.tokens)
+        self.cheese = Cheese(cheeseStartX, cheeseStartY, self.tokens)
         self.time_steps = 0
+        # The generator for the random starting positions of reset
+        self.rng = np.random.default_rng()
 
-        state = list(np.zeros((10, 10)))
-        state[self.mouse.getY()][self.mouse.getX()] = 1
-        state[self.cheese.getY()][self.cheese.getX()] = 2
-        self.map = state
+        self.map[self.mouse.getY()][self.mouse.getX()] = 1
+        self.map[self.cheese.getY()][self.cheese.getX()] = 2
+        self.observationMode = observationMode
+        # Exclusive upper bounds of the random [mouseX, mouseY, cheeseX, cheeseY] drawn by reset
+        self.bounds = [width, length, width, length]
+        self._mapView = self.map.view()
+        self._mapView.flags.writeable = False
 
         self.action_space =spaces.Discrete(4)
-        self.observation_space = spaces.Box(0, 9, shape=(10,10,), dtype=np.float32)
+        self.observation_space = spaces.Box(0, 9, shape=(length,width,), dtype=np.float32)
+        # The (x, y) offset of each action, up, down, left, right
+        self.moves = {0: (0, -1), 1: (0, 1), 2: (-1, 0), 3: (1, 0)}
+
+    def seed(self, seed=None):
+        '''
+        Seed the random starting positions used by reset
+
+        :param seed: seed for the environment's generator
+        :return: [seed]
+        '''
+        self.rng = np.random.default_rng(seed)
+        return [seed]
+
+    def get_state(self):
+        '''
+        Snapshot of the full environment state, including the generator used by reset
+
+        :return: bytes that can be given to set_state
+        '''
+        return pickle.dumps((
+            self.mouse.getX(), self.mouse.getY(), self.cheese.getX(), self.cheese.getY(), self.time_steps,
+            self.map.tobytes(), self.rng.bit_generator.state
+        ), pickle.HIGHEST_PROTOCOL)
+
+    def set_state(self, blob):
+        '''
+        Restore a snapshot taken by get_state
+
+        :param blob: bytes returned by get_state
+        '''
+        mouseX, mouseY, cheeseX, cheeseY, self.time_steps, grid, rngState = pickle.loads(blob)
+        self.mouse.setX(mouseX)
+        self.mouse.setY(mouseY)
+        self.cheese.setX(cheeseX)
+        self.cheese.setY(cheeseY)
+        np.copyto(self.map, np.frombuffer(grid, dtype=np.float32).reshape(self.map.shape))
+        self.rng.bit_generator.state = rngState
 
     def euclidDistance(self):
         return math.sqrt((self.mouse.getX() - self.cheese.getX())**2 + (self.mouse.getY() - self.cheese.getY())**2)
@@ -45,17 +99,11 @@ class MouseAndCheeseEnv(gym.Env):
     def createMap(self, length, width):
         '''
         Creates an empty map
-        :param length: length (horizontal) of map
-        :param width: width (vertical) of map
-        :return: map a 2D array
-        '''
-        out = []
-        for i in range(length):
-            temp = []
-            for j in range(width):
-                temp.append(0)
-            out.append(temp)
-        return out
+        :param length: length (vertical) of map
+        :param width: width (horizontal) of map
+        :return: map a length x width float32 array
+        '''
+        return np.zeros((length, width), dtype=np.float32)
 
     def checkInbounds(self, x, y, strict=False):
         '''
@@ -113,6 +161,20 @@ class MouseAndCheeseEnv(gym.Env):
         '''
         return self.map
 
+    def getObservation(self, out=None):
+        '''
+        Observation of the map according to observationMode
+
+        :param out: length x width float32 buffer, when given the map is copied into it and it is returned
+        :return: observation of the map
+        '''
+        if out is not None:
+            np.copyto(out, self.map)
+            return out
+        if self.observationMode == 'view':
+            return self._mapView
+        return self.map.copy()
+
     def getMousePosition(self):
         '''
         Get the position of the mouse
@@ -127,6 +189,14 @@ class MouseAndCheeseEnv(gym.Env):
         '''
         return self.cheese.getPosition()
 
+    def exportMDP(self):
+        '''
+        The exact transitions and rewards of the environment as tables, see mouseAndCheeseMDP
+
+        :return: nextState (S x 4), reward (S x 4), done (S x 4), terminal (S)
+        '''
+        return exportMDP(self.length, self.width)
+
     def getActionSpace(self):
         return self.action_space
 
@@ -183,19 +253,71 @@ class MouseAndCheeseEnv(gym.Env):
             else:
                 reward = -1
 
-        return np.array(self.map, dtype=np.float32), reward, done, {}
+        return self.getObservation(), reward, done, {}
+
+    def step_many(self, actions, autoReset=True):
+        '''
+        Take a sequence of actions in one call, the same as calling step for each of them but with the map
+        kept as a single array that is updated in place
+
+        :param actions: length T sequence of actions
+        :param autoReset: reset whenever the cheese is reached, the observation of that step is then the
+                          first observation of the new episode
+        :return: observations (T x length x width float32), rewards (T), dones (T)
+        '''
+        actions = np.asarray(actions).tolist()
+        steps = len(actions)
+        observations = np.empty((steps, self.length, self.width), dtype=np.float32)
+        rewards = np.empty(steps)
+        dones = np.zeros(steps, dtype=bool)
+
+        code = self.mouse.getCode()
+        grid = self.map
+        mouseX, mouseY = self.mouse.getPosition()
+        cheeseX, cheeseY = self.cheese.getPosition()
+        for t, action in enumerate(actions):
+            previous = (mouseX - cheeseX) ** 2 + (mouseY - cheeseY) ** 2
+            if action in self.moves:
+                x = mouseX + self.moves[action][0]
+                y = mouseY + self.moves[action][1]
+                # Move when the destination is on the map and clean up the previous position
+                if self.checkInbounds(x, y):
+                    grid[y, x] = code
+                    grid[mouseY, mouseX] = 0
+                    mouseX, mouseY = x, y
+            # Check if the game is won
+            if mouseX == cheeseX and mouseY == cheeseY:
+                dones[t] = True
+                rewards[t] = 10
+                if autoReset:
+                    self.mouse.setX(mouseX)
+                    self.mouse.setY(mouseY)
+                    self.reset()
+                    mouseX, mouseY = self.mouse.getPosition()
+                    cheeseX, cheeseY = self.cheese.getPosition()
+            elif previous > (mouseX - cheeseX) ** 2 + (mouseY - cheeseY) ** 2:
+                rewards[t] = 1
+            else:
+                rewards[t] = -1
+            observations[t] = grid
+
+        self.mouse.setX(mouseX)
+        self.mouse.setY(mouseY)
+        return observations, rewards, dones
 
     def reset(self):
-        self.mouse.setX(random.randint(0,9))
-        self.mouse.setY(random.randint(0,9))
-        self.cheese.setX(random.randint(0,9))
-        self.cheese.setY(random.randint(0,9))
-        state = list(np.zeros((10, 10)))
-        state[self.mouse.getY()][self.mouse.getX()] = 1
-        state[self.cheese.getY()][self.cheese.getX()] = 2
-        self.map = state
-
-        return np.array(state, dtype=np.float32)
+        # Only the mouse and cheese cells can be set, so clearing them empties the map
+        self.place(self.mouse.getX(), self.mouse.getY(), 0)
+        self.place(self.cheese.getX(), self.cheese.getY(), 0)
+        mouseX, mouseY, cheeseX, cheeseY = self.rng.integers(0, self.bounds).tolist()
+        self.mouse.setX(mouseX)
+        self.mouse.setY(mouseY)
+        self.cheese.setX(cheeseX)
+        self.cheese.setY(cheeseY)
+        self.map[mouseY][mouseX] = 1
+        self.map[cheeseY][cheeseX] = 2
+
+        return self.getObservation()
 
     def render(self, mode='human'):
         print(self.mouse.getX())
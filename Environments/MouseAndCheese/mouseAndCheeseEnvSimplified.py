@@ -1,10 +1,11 @@
 from Environments.MouseAndCheese.mouse import Mouse
 from Environments.MouseAndCheese.cheese import Cheese
+from Environments.MouseAndCheese.tokenRegistry import TokenRegistry
 import math
 from gym import spaces
 import numpy as np
 import gym
-import random
+import pickle
 
 
 class MouseAndCheeseEnvSimplified(gym.Env):
@@ -27,18 +28,56 @@ class MouseAndCheeseEnvSimplified(gym.Env):
         super(MouseAndCheeseEnvSimplified, self).__init__()
         self.length = length
         self.width = width
-        self.mouse = Mouse(mouseStartX, mouseStartY)
+        # The mouse and cheese share one token registry
+        self.tokens = TokenRegistry()
+        self.mouse = Mouse(mouseStartX, mouseStartY, self.tokens)
+        # The generator for the random starting positions
+        self.rng = np.random.default_rng()
         if cheeseStartX == None:
-            cheeseStartX = random.randint(0,width)
+            cheeseStartX = int(self.rng.integers(0, width + 1))
         if cheeseStartY == None:
-            cheeseStartY = random.randint(0,length)
-        self.cheese = Cheese(cheeseStartX, cheeseStartY)
+            cheeseStartY = int(self.rng.integers(0, length + 1))
+        self.cheese = Cheese(cheeseStartX, cheeseStartY, self.tokens)
         self.time_steps = 0
 
 
         self.action_space = spaces.Discrete(4)
         self.observation_space = spaces.Box(0, 9, shape=(1, 4,), dtype=np.float32)
 
+    def seed(self, seed=None):
+        '''
+        Seed the random starting positions used by reset
+
+        :param seed: seed for the environment's generator
+        :return: [seed]
+        '''
+        self.rng = np.random.default_rng(seed)
+        return [seed]
+
+    def get_state(self):
+        '''
+        Snapshot of the full environment state, including the generator used by reset
+
+        :return: bytes that can be given to set_state
+        '''
+        return pickle.dumps((
+            self.mouse.getX(), self.mouse.getY(), self.cheese.getX(), self.cheese.getY(), self.time_steps,
+            self.rng.bit_generator.state
+        ), pickle.HIGHEST_PROTOCOL)
+
+    def set_state(self, blob):
+        '''
+        Restore a snapshot taken by get_state
+
+        :param blob: bytes returned by get_state
+        '''
+        mouseX, mouseY, cheeseX, cheeseY, self.time_steps, rngState = pickle.loads(blob)
+        self.mouse.setX(mouseX)
+        self.mouse.setY(mouseY)
+        self.cheese.setX(cheeseX)
+        self.cheese.setY(cheeseY)
+        self.rng.bit_generator.state = rngState
+
     def euclidDistance(self):
         return math.sqrt((self.mouse.getX() - self.cheese.getX()) ** 2 + (self.mouse.getY() - self.cheese.getY()) ** 2)
 
@@ -122,11 +161,58 @@ class MouseAndCheeseEnvSimplified(gym.Env):
 
         return np.array([[self.mouse.getX(), self.mouse.getY(), self.cheese.getX(), self.cheese.getY()]], dtype=np.float32), reward, done, {}
 
+    def step_many(self, actions, autoReset=True):
+        '''
+        Take a sequence of actions in one call, the same as calling step for each of them
+
+        :param actions: length T sequence of actions
+        :param autoReset: reset whenever the cheese is reached, the observation of that step is then the
+                          first observation of the new episode
+        :return: observations (T x 1 x 4 float32), rewards (T), dones (T)
+        '''
+        actions = np.asarray(actions).tolist()
+        steps = len(actions)
+        observations = []
+        rewards = np.empty(steps)
+        dones = np.zeros(steps, dtype=bool)
+
+        mouseX, mouseY = self.mouse.getPosition()
+        cheeseX, cheeseY = self.cheese.getPosition()
+        for t, action in enumerate(actions):
+            previous = (mouseX - cheeseX) ** 2 + (mouseY - cheeseY) ** 2
+            # Same bounds as step
+            if action == 0 and mouseY > 0:
+                mouseY -= 1
+            elif action == 1 and mouseY < self.length:
+                mouseY += 1
+            elif action == 2 and mouseX > 0:
+                mouseX -= 1
+            elif action == 3 and mouseX < self.width:
+                mouseX += 1
+            # Check if the game is won
+            if mouseX == cheeseX and mouseY == cheeseY:
+                dones[t] = True
+                rewards[t] = 10
+                if autoReset:
+                    self.reset()
+                    mouseX, mouseY = self.mouse.getPosition()
+                    cheeseX, cheeseY = self.cheese.getPosition()
+            elif previous > (mouseX - cheeseX) ** 2 + (mouseY - cheeseY) ** 2:
+                rewards[t] = 1
+            else:
+                rewards[t] = -1
+            observations.append((mouseX, mouseY, cheeseX, cheeseY))
+
+        self.mouse.setX(mouseX)
+        self.mouse.setY(mouseY)
+        return np.array(observations, dtype=np.float32).reshape(steps, 1, 4), rewards, dones
+
     def reset(self):
-        self.mouse.setX(random.randint(0, 9))
-        self.mouse.setY(random.randint(0, 9))
-        self.cheese.setX(random.randint(0, 9))
-        self.cheese.setY(random.randint(0, 9))
+        mouseX, mouseY, cheeseX, cheeseY = self.rng.integers(0, [self.width, self.length, self.width, self.length]).tolist()
+        self.mouse.setX(mouseX)
+        self.mouse.setY(mouseY)
+        self.cheese.setX(cheeseX)
+        self.cheese.setY(cheeseY)
 
         return np.array([[self.mouse.getX(), self.mouse.getY(), self.cheese.getX(), self.cheese.getY()]], dtype=np.float32)
 
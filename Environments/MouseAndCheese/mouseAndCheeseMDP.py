@@ -0,0 +1,67 @@
+import numpy as np
+
+'''
+The exact MDP of MouseAndCheeseEnv on a width x length map
+
+A state is the joint position (mouseX, mouseY, cheeseX, cheeseY) and its index is the flat index in an array
+of shape (width, length, width, length), so a (numStates, 4) Q array reshaped to (width, length, width, length, 4)
+lines up with the Q tables indexed QTable[mouseX][mouseY][cheeseX][cheeseY][action].
+
+The environment is deterministic, so the transitions are exported as a (numStates, 4) table of next states,
+one entry per (state, action) which is the sparse form of the transition tensor, transitionTensor expands it
+into the dense (numStates, 4, numStates) probabilities for small maps.
+'''
+
+# The (x, y) offset of each action, up, down, left, right
+MOVES = np.array([[0, -1], [0, 1], [-1, 0], [1, 0]])
+
+
+'''
+Returns (nextState, reward, done, terminal)
+    nextState   (numStates, 4) int64    state reached by each action
+    reward      (numStates, 4) float64  10 for reaching the cheese, otherwise 1 when the mouse got closer and -1
+    done        (numStates, 4) bool     the action ends the episode
+    terminal    (numStates,)   bool     the mouse is already on the cheese, these states are absorbing with
+                                        reward 0
+'''
+def exportMDP(length=10, width=10):
+    shape = (width, length, width, length)
+    mouseX, mouseY, cheeseX, cheeseY = [axis.ravel() for axis in np.indices(shape)]
+    numStates = mouseX.size
+    previous = (mouseX - cheeseX) ** 2 + (mouseY - cheeseY) ** 2
+
+    nextState = np.empty((numStates, len(MOVES)), dtype=np.int64)
+    reward = np.empty((numStates, len(MOVES)))
+    done = np.empty((numStates, len(MOVES)), dtype=bool)
+    for action, (dx, dy) in enumerate(MOVES):
+        # A move that would leave the map does nothing
+        x = np.clip(mouseX + dx, 0, width - 1)
+        y = np.clip(mouseY + dy, 0, length - 1)
+        nextState[:, action] = np.ravel_multi_index((x, y, cheeseX, cheeseY), shape)
+        current = (x - cheeseX) ** 2 + (y - cheeseY) ** 2
+        done[:, action] = current == 0
+        reward[:, action] = np.where(current == 0, 10.0, np.where(current < previous, 1.0, -1.0))
+
+    terminal = previous == 0
+    nextState[terminal] = np.flatnonzero(terminal)[:, np.newaxis]
+    reward[terminal] = 0
+    done[terminal] = True
+    return nextState, reward, done, terminal
+
+
+'''
+Flat index of the state (mouseX, mouseY, cheeseX, cheeseY), each may be an array
+'''
+def stateIndex(mouseX, mouseY, cheeseX, cheeseY, length=10, width=10):
+    return np.ravel_multi_index((mouseX, mouseY, cheeseX, cheeseY), (width, length, width, length))
+
+
+'''
+Dense (numStates, numActions, numStates) transition probabilities of a deterministic next state table
+'''
+def transitionTensor(nextState):
+    numStates, numActions = nextState.shape
+    tensor = np.zeros((numStates, numActions, numStates))
+    rows, actions = np.indices(nextState.shape)
+    tensor[rows, actions, nextState] = 1
+    return tensor
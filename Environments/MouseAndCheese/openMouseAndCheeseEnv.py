@@ -1,7 +1,4 @@
 from Environments.MouseAndCheese.mouseAndCheeseEnv import MouseAndCheeseEnv
-from Environments.MouseAndCheese.mouse import Mouse
-from Environments.MouseAndCheese.cheese import Cheese
-import random
 
 class OpenMouseAndCheeseEnv(MouseAndCheeseEnv):
     '''
@@ -18,9 +15,13 @@ class OpenMouseAndCheeseEnv(MouseAndCheeseEnv):
     0 - open space
     1 - Mouse
     2 - Cheese
+
+    reset is the one of MouseAndCheeseEnv, the map is cleared and redrawn in place so a 'view' observation
+    stays live across episodes
     '''
-    def __init__(self, length=10, width=10, mouseStartX=0, mouseStartY=0, cheeseStartX=5, cheeseStartY=5):
-        super().__init__(length, width, mouseStartX, mouseStartY, cheeseStartX, cheeseStartY)
+    def __init__(self, length=10, width=10, mouseStartX=0, mouseStartY=0, cheeseStartX=5, cheeseStartY=5,
+                 observationMode='copy'):
+        super().__init__(length, width, mouseStartX, mouseStartY, cheeseStartX, cheeseStartY, observationMode)
         # Place mouse
         self.place(self.mouse.getX(), self.mouse.getY(), self.mouse.getCode(), strict=True)
         # Place cheese
@@ -80,12 +81,4 @@ class OpenMouseAndCheeseEnv(MouseAndCheeseEnv):
             reward = 1
         else:
             reward = -1
-        return self.map, reward, done, {}
-
-    def reset(self):
-
-        self.map = self.createMap(self.length, self.width)
-        self.length = self.length
-        self.width = self.width
-        self.mouse = Mouse(random.randint(0,self.width), random.randint(0,self.length))
-        self.cheese = Cheese(random.randint(0,self.width), random.randint(0,self.length))
+        return self.getObservation(), reward, done, {}
@@ -1,37 +1,53 @@
+from Environments.MouseAndCheese.tokenRegistry import TokenRegistry
+
+
 class EnvToken:
     '''
     Abstract parent class to act as the data structure for a 'token' in the environment
     these are objects within the environment
+
+    A token is a view of one entry of a TokenRegistry, tokens that share a registry can be queried and
+    moved together through it. Without a registry the token gets one of its own.
     '''
-    def __init__(self, x, y, code, name):
-        self.x = x
-        self.y = y
-        self.code = code
-        self.name = name
+    __slots__ = ('registry', 'index')
+
+    def __init__(self, x, y, code, name, registry=None):
+        if registry is None:
+            registry = TokenRegistry(1)
+        self.registry = registry
+        self.index = registry.add(x, y, code, name)
 
     '''
     Getters
     '''
     def getX(self):
-        return self.x
+        return self.registry.x.item(self.index)
 
     def getY(self):
-        return self.y
+        return self.registry.y.item(self.index)
 
     def getCode(self):
-        return self.code
+        return self.registry.code.item(self.index)
 
     def getName(self):
-        return self.name
+        return self.registry.typeNames[self.registry.typeId[self.index]]
 
     def getPosition(self):
-        return [self.x, self.y]
+        return [self.registry.x.item(self.index), self.registry.y.item(self.index)]
 
     '''
     Setters
     '''
     def setX(self, newX):
-        self.x = newX
+        self.registry.x[self.index] = newX
 
     def setY(self, newY):
-        self.y = newY
+        self.registry.y[self.index] = newY
+
+    '''
+    Attribute access kept for code that reads the fields directly
+    '''
+    x = property(getX, setX)
+    y = property(getY, setY)
+    code = property(getCode)
+    name = property(getName)
@@ -0,0 +1,146 @@
+import numpy as np
+
+
+class TokenRegistry:
+    '''
+    Struct of arrays storage for the tokens of an environment, token i is at (x[i], y[i]) with map code
+    code[i] and type typeId[i], typeNames[typeId[i]] is the name of its type (e.g. "Mouse")
+
+    Only the first count entries of the arrays are in use, they grow by doubling as tokens are added,
+    so the arrays should be read through the registry and not kept. Every query works on all of the tokens
+    of a type at once.
+    '''
+
+    def __init__(self, capacity=8):
+        '''
+        Create an empty registry
+
+        :param capacity: number of tokens to allocate room for up front
+        '''
+        self.count = 0
+        self.x = np.zeros(capacity, dtype=np.int64)
+        self.y = np.zeros(capacity, dtype=np.int64)
+        self.code = np.zeros(capacity, dtype=np.int64)
+        self.typeId = np.zeros(capacity, dtype=np.int64)
+        self.typeNames = []
+        self._typeIds = {}
+
+    def add(self, x, y, code, name):
+        '''
+        Add a token
+
+        :param x: x co-ordinate of the token
+        :param y: y co-ordinate of the token
+        :param code: symbol of the token on the map
+        :param name: name of the token's type
+        :return: index of the token
+        '''
+        if self.count == len(self.x):
+            self._grow(max(2 * len(self.x), 1))
+        index = self.count
+        self.x[index] = x
+        self.y[index] = y
+        self.code[index] = code
+        self.typeId[index] = self.getTypeId(name, create=True)
+        self.count += 1
+        return index
+
+    def _grow(self, capacity):
+        for field in ('x', 'y', 'code', 'typeId'):
+            grown = np.zeros(capacity, dtype=np.int64)
+            grown[:self.count] = getattr(self, field)[:self.count]
+            setattr(self, field, grown)
+
+    def getTypeId(self, name, create=False):
+        '''
+        Type id of a token type
+
+        :param name: name of the type
+        :param create: register the type if it is unknown instead of raising an exception
+        :return: type id
+        '''
+        if name not in self._typeIds:
+            if not create:
+                raise Exception("Unknown token type {name}".format(name=name))
+            self._typeIds[name] = len(self.typeNames)
+            self.typeNames.append(name)
+        return self._typeIds[name]
+
+    def tokensOf(self, name):
+        '''
+        :param name: name of a token type
+        :return: indices of every token of that type
+        '''
+        if name not in self._typeIds:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(self.typeId[:self.count] == self._typeIds[name])
+
+    def getPositions(self, indices=None):
+        '''
+        :param indices: indices of the tokens, every token when None
+        :return: (k, 2) array of [x, y]
+        '''
+        if indices is None:
+            indices = slice(0, self.count)
+        return np.stack([self.x[indices], self.y[indices]], axis=-1)
+
+    def tokensAt(self, x, y):
+        '''
+        :param x: x co-ordinate of the cell
+        :param y: y co-ordinate of the cell
+        :return: indices of every token in the cell
+        '''
+        return np.flatnonzero((self.x[:self.count] == x) & (self.y[:self.count] == y))
+
+    def nearestDistance(self, fromName, toName):
+        '''
+        Euclidean distance from every token of one type to the nearest token of another
+
+        :param fromName: type of the tokens to measure from, e.g. "Mouse"
+        :param toName: type of the tokens to measure to, e.g. "Cheese"
+        :return: distances (k,) and the indices of the nearest tokens (k,), inf and -1 when there are none
+        '''
+        sources = self.tokensOf(fromName)
+        targets = self.tokensOf(toName)
+        if len(targets) == 0:
+            return np.full(len(sources), np.inf), np.full(len(sources), -1, dtype=np.int64)
+        dx = self.x[sources, np.newaxis] - self.x[targets]
+        dy = self.y[sources, np.newaxis] - self.y[targets]
+        squared = dx * dx + dy * dy
+        nearest = squared.argmin(axis=1)
+        return np.sqrt(squared[np.arange(len(sources)), nearest]), targets[nearest]
+
+    def moveType(self, name, dx, dy, width=None, length=None):
+        '''
+        Move every token of a type
+
+        :param name: name of the type
+        :param dx: change in x, a single value or one per token of the type
+        :param dy: change in y, a single value or one per token of the type
+        :param width: when given with length the tokens are kept within a width x length map
+        :param length: when given with width the tokens are kept within a width x length map
+        :return: indices of the tokens that were moved
+        '''
+        indices = self.tokensOf(name)
+        x = self.x[indices] + dx
+        y = self.y[indices] + dy
+        if width is not None and length is not None:
+            np.clip(x, 0, width - 1, out=x)
+            np.clip(y, 0, length - 1, out=y)
+        self.x[indices] = x
+        self.y[indices] = y
+        return indices
+
+    def draw(self, grid):
+        '''
+        Write the code of every token into a map indexed [y][x], later tokens are drawn over earlier ones
+
+        :param grid: the map
+        :return: the map
+        '''
+        width = grid.shape[1]
+        cells = self.y[:self.count] * width + self.x[:self.count]
+        # The last token in each cell, found as the first one of the reversed order
+        cells, first = np.unique(cells[::-1], return_index=True)
+        grid[cells // width, cells % width] = self.code[self.count - 1 - first]
+        return grid
@@ -0,0 +1,143 @@
+from Methods.DQN.replayBuffer import ReplayBuffer
+import json
+import os
+import numpy as np
+
+'''
+Replay memory kept in memory mapped files
+
+The arrays of a ReplayBuffer are .npy files in one directory, mapped into memory, so a buffer of millions of
+transitions only holds the pages that were recently written or sampled in RAM and the operating system writes
+the rest back to disk. The cursor and counts that locate the transitions are kept in index.json next to them.
+
+Creating an MmapReplayBuffer on a directory that already holds one reopens it with every transition it held at
+its last flush, so training that restarts continues with a warm buffer. flush is called every flushInterval
+transitions and by close. The first transition added after a flush marks the index dirty before anything is
+written. The pages written after the last flush can still reach the files before the process stops, so reopening
+a dirty buffer drops every slot those transitions could have written, the ones after the cursor of the index.
+The transitions added after the last flush are lost and never mixed with the flushed ones. A buffer closed or
+flushed before the process stopped reopens with all of its transitions.
+
+For LunarEnv the observations are float32 vectors of length 8,
+    MmapReplayBuffer("lunarReplay", capacity=4000000, observationShape=(8,), observationDtype=np.float32)
+takes about 200MB of disk and little of it stays resident.
+'''
+
+FORMAT = 1
+
+
+class MmapReplayBuffer(ReplayBuffer):
+
+    def __init__(self, directory, capacity=1000000, observationShape=(10, 10, 1), observationDtype=np.uint8,
+                 flushInterval=10000, seed=None):
+        '''
+        Opens the replay memory in directory, creating it when it does not exist yet
+
+        :param directory: directory of the arrays and index.json
+        :param capacity: number of observation slots, the memory holds slightly fewer transitions than this
+        :param observationShape: shape of one observation
+        :param observationDtype: dtype the observations are stored in, it must hold their values exactly
+        :param flushInterval: number of transitions added between flushes
+        :param seed: seed for the sampling
+        '''
+        self.directory = directory
+        self.flushInterval = flushInterval
+        self.indexPath = os.path.join(directory, 'index.json')
+        os.makedirs(directory, exist_ok=True)
+
+        index = None
+        if os.path.exists(self.indexPath):
+            with open(self.indexPath) as indexFile:
+                index = json.load(indexFile)
+            layout = (index['capacity'], index['observationShape'], index['observationDtype'])
+            expected = (capacity, list(observationShape), np.dtype(observationDtype).str)
+            if index.get('format') != FORMAT or layout != expected:
+                raise Exception("{path} holds a replay memory of capacity {capacity} with {dtype} observations of "
+                                "shape {shape}, not the one asked for".format(path=self.indexPath,
+                                                                              capacity=layout[0], shape=layout[1],
+                                                                              dtype=layout[2]))
+        self._reopen = index is not None
+        super().__init__(capacity, observationShape, observationDtype, seed)
+
+        if index is not None:
+            self.cursor = index['cursor']
+            self.filled = index['filled']
+            self.hasNext = index['hasNext']
+            if not index['clean']:
+                # At most flushInterval transitions were added after the flush and each wrote at most the two
+                # slots after the one before it, starting with the slot at the cursor
+                written = 2 * index['flushInterval'] + 1
+                if written >= capacity:
+                    # They may have gone round the whole buffer, so no slot can be trusted
+                    self.valid[:] = False
+                    self.hasNext = False
+                else:
+                    self.valid[(self.cursor + np.arange(written)) % capacity] = False
+            # Flags in slots the index has never seen are dropped as well, every other flag on disk is counted,
+            # so count always matches the flags that add will later clear
+            self.valid[self.filled:] = False
+            self.valid.flush()
+            self.count = int(np.count_nonzero(self.valid))
+        self.sinceFlush = 0
+
+    def _createArray(self, name, shape, dtype):
+        path = os.path.join(self.directory, name + '.npy')
+        if self._reopen:
+            array = np.load(path, mmap_mode='r+')
+            if array.shape != shape or array.dtype != dtype:
+                raise Exception("{path} does not match its index".format(path=path))
+            return array
+        # The file is created sparse, its pages are only allocated once they are written
+        return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+
+    def add(self, state, action, reward, newState, done):
+        '''
+        Store a transition, flushing every flushInterval transitions
+
+        :param state: previous state
+        :param action: action taken
+        :param reward: reward for action
+        :param newState: new state
+        :param done: whether the game was completed
+        '''
+        if self.sinceFlush == 0:
+            # Slots the index counts as flushed are about to be overwritten
+            self._writeIndex(clean=False)
+        super().add(state, action, reward, newState, done)
+        self.sinceFlush += 1
+        if self.sinceFlush >= self.flushInterval:
+            self.flush()
+
+    def flush(self):
+        '''
+        Write the arrays back to disk, then the index that locates the transitions in them
+        '''
+        for array in (self.observations, self.actions, self.rewards, self.dones, self.valid):
+            array.flush()
+        self._writeIndex(clean=True)
+        self.sinceFlush = 0
+
+    def _writeIndex(self, clean):
+        index = {
+            'format': FORMAT,
+            'capacity': self.capacity,
+            'observationShape': list(self.observationShape),
+            'observationDtype': self.observationDtype.str,
+            'cursor': self.cursor,
+            'filled': self.filled,
+            'hasNext': self.hasNext,
+            'flushInterval': self.flushInterval,
+            'clean': clean
+        }
+        # Replaced in one step so a restart never reads a half written index
+        temporaryPath = self.indexPath + '.tmp'
+        with open(temporaryPath, 'w') as indexFile:
+            json.dump(index, indexFile, indent=4)
+        os.replace(temporaryPath, self.indexPath)
+
+    def close(self):
+        '''
+        Flush and drop the maps of the files, the buffer can not be used afterwards
+        '''
+        self.flush()
+        self.observations = self.actions = self.rewards = self.dones = self.valid = None
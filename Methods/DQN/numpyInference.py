@@ -0,0 +1,119 @@
+from numpy.lib.stride_tricks import sliding_window_view
+import numpy as np
+
+'''
+Forward pass of a trained Keras Sequential model in NumPy
+
+A Keras predict call has a fixed cost of around a millisecond however small the network and the batch are,
+which is most of the time an agent spends choosing an action. NumpyQNetwork copies the weights of a model once
+and runs the same layers with NumPy, a single observation takes microseconds and a batch of observations from
+many environments takes one call. After the model trains, refresh copies its new weights.
+
+Supported layers, all channels last with valid padding
+    Conv2D          any kernel size and strides, convolved over sliding_window_view windows
+    MaxPooling2D    any pool size and strides
+    Flatten
+    Dense
+    Dropout         does nothing at inference
+with the activations linear, relu, tanh and sigmoid.
+'''
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    'tanh': np.tanh,
+    'sigmoid': lambda x: 1 / (1 + np.exp(-x))
+}
+
+
+class NumpyQNetwork:
+
+    def __init__(self, model):
+        '''
+        Reads the layers and the weights of a model
+
+        :param model: Keras Sequential model made of the supported layers
+        '''
+        self.model = model
+        self.layers = []
+        for layer in model.layers:
+            kind = type(layer).__name__
+            config = layer.get_config()
+            if kind not in ('Conv2D', 'MaxPooling2D', 'Flatten', 'Dense', 'Dropout', 'InputLayer'):
+                raise Exception("{kind} layers are not supported".format(kind=kind))
+            if config.get('padding', 'valid') != 'valid':
+                raise Exception("{name} uses {padding} padding, only valid padding is supported".format(
+                    name=config['name'], padding=config['padding']))
+            if config.get('data_format', 'channels_last') != 'channels_last':
+                raise Exception("{name} is not channels last".format(name=config['name']))
+            if tuple(config.get('dilation_rate', (1, 1))) != (1, 1):
+                raise Exception("{name} is dilated".format(name=config['name']))
+            activation = config.get('activation', 'linear')
+            if activation not in ACTIVATIONS:
+                raise Exception("{name} uses the unsupported activation {activation}".format(
+                    name=config['name'], activation=activation))
+            self.layers.append({
+                'kind': kind,
+                'config': config,
+                'activation': ACTIVATIONS[activation],
+                'numWeights': len(layer.get_weights()),
+                'weights': []
+            })
+        self.refresh()
+
+    def refresh(self, weights=None):
+        '''
+        Copy the current weights of the model
+
+        :param weights: the list model.get_weights() returns, read from the model when None
+        '''
+        if weights is None:
+            weights = self.model.get_weights()
+        position = 0
+        for layer in self.layers:
+            layer['weights'] = [np.array(weight, dtype=np.float32)
+                                for weight in weights[position:position + layer['numWeights']]]
+            position += layer['numWeights']
+        if position != len(weights):
+            raise Exception("Got {given} weight arrays for a model of {expected}".format(
+                given=len(weights), expected=position))
+
+    def predict(self, observations):
+        '''
+        Output of the model for a batch of observations
+
+        :param observations: (N, *input shape) observations
+        :return: (N, outputs) float32 array
+        '''
+        x = np.asarray(observations, dtype=np.float32)
+        for layer in self.layers:
+            kind = layer['kind']
+            config = layer['config']
+            weights = layer['weights']
+            if kind == 'Conv2D':
+                kernel = weights[0]
+                strideY, strideX = config['strides']
+                # (N, outY, outX, channels, kernelY, kernelX) windows, every one multiplied with the kernel
+                windows = sliding_window_view(x, kernel.shape[:2], axis=(1, 2))[:, ::strideY, ::strideX]
+                x = np.tensordot(windows, kernel, axes=([3, 4, 5], [2, 0, 1]))
+            elif kind == 'MaxPooling2D':
+                poolY, poolX = config['pool_size']
+                strideY, strideX = config['strides'] or config['pool_size']
+                if (strideY, strideX) == (poolY, poolX):
+                    # Non overlapping pools are a reshape
+                    height, width = x.shape[1] // poolY, x.shape[2] // poolX
+                    x = x[:, :height * poolY, :width * poolX].reshape(
+                        len(x), height, poolY, width, poolX, x.shape[3]).max(axis=(2, 4))
+                else:
+                    windows = sliding_window_view(x, (poolY, poolX), axis=(1, 2))[:, ::strideY, ::strideX]
+                    x = windows.max(axis=(4, 5))
+            elif kind == 'Flatten':
+                x = x.reshape(len(x), -1)
+            elif kind == 'Dense':
+                x = x @ weights[0]
+            else:
+                continue
+            if config.get('use_bias', False):
+                x = x + weights[1]
+            x = layer['activation'](x)
+        return x
@@ -0,0 +1,163 @@
+from Methods.DQN.replayBuffer import ReplayBuffer
+import numpy as np
+
+'''
+Prioritized experience replay
+
+Every transition has a priority (|TD error| + epsilon) ** alpha and is sampled with probability proportional to
+it, new transitions get the largest priority seen so far so they are replayed at least once. The bias this adds
+to the updates is corrected by the importance sampling weights (N * P(i)) ** -beta returned with every batch,
+divided by their largest value in the batch so they only ever scale updates down.
+
+The priorities are kept in a SumTree, a binary tree in one array where every node holds the sum of its two
+children, so the total is the root, a proportional sample is one walk from the root to a leaf and changing a
+priority updates the nodes above it. Whole batches walk and update the tree together, one level at a time.
+'''
+
+
+class SumTree:
+
+    def __init__(self, capacity):
+        '''
+        Creates a tree of capacity zero priorities
+
+        :param capacity: number of leaves
+        '''
+        self.capacity = capacity
+        # Leaves are the last size nodes, node i has the children 2i and 2i + 1, node 0 is unused
+        self.size = 1
+        while self.size < capacity:
+            self.size *= 2
+        self.depth = self.size.bit_length() - 1
+        self.tree = np.zeros(2 * self.size)
+
+    def total(self):
+        return self.tree[1]
+
+    def get(self, indices):
+        '''
+        :param indices: leaf indices
+        :return: their priorities
+        '''
+        return self.tree[np.asarray(indices) + self.size]
+
+    def update(self, indices, priorities):
+        '''
+        Set the priorities of some leaves, for a repeated index the last priority given is kept
+
+        :param indices: leaf indices
+        :param priorities: new priorities
+        '''
+        nodes = np.asarray(indices) + self.size
+        self.tree[nodes] = priorities
+        for level in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def set(self, index, priority):
+        '''
+        Set the priority of one leaf, a scalar walk up the tree which is cheaper than update for a single leaf
+
+        :param index: leaf index
+        :param priority: new priority
+        '''
+        tree = self.tree
+        node = index + self.size
+        tree[node] = priority
+        node //= 2
+        while node:
+            tree[node] = tree[2 * node] + tree[2 * node + 1]
+            node //= 2
+
+    def find(self, values):
+        '''
+        Leaves found by walking down from the root with each value, the leaf i is found for values in
+        [sum of the leaves before i, that sum + priority of i)
+
+        :param values: values in [0, total())
+        :return: leaf indices
+        '''
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for level in range(self.depth):
+            left = self.tree[2 * nodes]
+            right = values >= left
+            values -= left * right
+            nodes = 2 * nodes + right
+        return nodes - self.size
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+
+    def __init__(self, capacity=10000, observationShape=(10, 10, 1), observationDtype=np.uint8, alpha=.6, beta=.4,
+                 betaIncrement=.001, epsilon=1e-6, seed=None):
+        '''
+        Creates an empty prioritized replay memory
+
+        :param capacity: number of observation slots, the memory holds slightly fewer transitions than this
+        :param observationShape: shape of one observation
+        :param observationDtype: dtype the observations are stored in, it must hold their values exactly
+        :param alpha: how strongly the priorities shape the sampling, 0 is uniform
+        :param beta: initial strength of the importance sampling correction, 1 corrects fully
+        :param betaIncrement: beta grows by this with every batch sampled, up to 1
+        :param epsilon: added to every |TD error| so every transition can be sampled
+        :param seed: seed for the sampling
+        '''
+        self.priorities = SumTree(capacity)
+        self.alpha = alpha
+        self.beta = beta
+        self.betaIncrement = betaIncrement
+        self.epsilon = epsilon
+        self.maxPriority = 1.0
+        super().__init__(capacity, observationShape, observationDtype, seed)
+
+    def _setValid(self, slot, valid):
+        super()._setValid(slot, valid)
+        # Slots that are not transitions are never drawn
+        self.priorities.set(slot, self.maxPriority ** self.alpha if valid else 0.0)
+
+    def sampleIndices(self, batchSize):
+        '''
+        :param batchSize: number of transitions
+        :return: (batchSize,) slots of transitions drawn in proportion to their priorities, one from each of
+                 batchSize equal parts of the total
+        '''
+        if self.count == 0:
+            raise Exception("The replay memory holds no transitions")
+        total = self.priorities.total()
+        values = (np.arange(batchSize) + self.rng.random(batchSize)) * (total / batchSize)
+        indices = self.priorities.find(np.minimum(values, np.nextafter(total, 0)))
+        # Rounding in the sums can end a walk on an empty leaf
+        invalid = ~self.valid[indices]
+        if invalid.any():
+            indices[invalid] = super().sampleIndices(int(invalid.sum()))
+        return indices
+
+    def sample(self, batchSize):
+        '''
+        Random minibatch of transitions drawn in proportion to their priorities
+
+        :param batchSize: number of transitions
+        :return: states, actions, rewards, new states, dones, importance sampling weights and the slots of the
+                 transitions to give back to updatePriorities
+        '''
+        indices = self.sampleIndices(batchSize)
+        probabilities = self.priorities.get(indices) / self.priorities.total()
+        weights = (self.count * probabilities) ** -self.beta
+        weights = (weights / weights.max()).astype(np.float32)
+        self.beta = min(1.0, self.beta + self.betaIncrement)
+        return self.gather(indices) + (weights, indices)
+
+    def updatePriorities(self, indices, errors):
+        '''
+        Set the priorities of sampled transitions from their new TD errors
+
+        :param indices: slots returned by sample
+        :param errors: TD error of every slot
+        '''
+        priorities = np.abs(errors) + self.epsilon
+        self.maxPriority = max(self.maxPriority, priorities.max())
+        # Slots that stopped being transitions since they were sampled stay at zero
+        indices = np.asarray(indices)
+        keep = self.valid[indices]
+        self.priorities.update(indices[keep], priorities[keep] ** self.alpha)
@@ -0,0 +1,130 @@
+import numpy as np
+
+'''
+Replay memory for DQN agents backed by preallocated arrays
+
+Transitions are written into per field arrays at a cursor that wraps around once capacity slots are used, the
+oldest transitions are overwritten first. Consecutive transitions of an episode share their observations, the
+state of transition k is observations[k] and its new state is observations[k + 1], so an episode of n steps
+stores n + 1 observations instead of 2n. When a transition does not start from the new state of the one before
+it, as happens when an episode ends, that new state keeps a slot of its own which is never sampled as a
+transition.
+
+Observations are stored in observationDtype, uint8 is enough for the grid codes of the mouse and cheese maps,
+and are returned as contiguous float32 arrays ready to be given to a model. Sampling draws slots uniformly and
+gathers them with fancy indexing, so its cost does not depend on the capacity.
+'''
+
+
+class ReplayBuffer:
+
+    def __init__(self, capacity=10000, observationShape=(10, 10, 1), observationDtype=np.uint8, seed=None):
+        '''
+        Creates an empty replay memory
+
+        :param capacity: number of observation slots, the memory holds slightly fewer transitions than this
+        :param observationShape: shape of one observation, states given with a leading batch axis of 1 are
+                                 reshaped to it
+        :param observationDtype: dtype the observations are stored in, it must hold their values exactly
+        :param seed: seed for the sampling
+        '''
+        self.capacity = capacity
+        self.observationShape = tuple(observationShape)
+        self.observationDtype = np.dtype(observationDtype)
+        self.rng = np.random.default_rng(seed)
+
+        self.observations = self._createArray('observations', (capacity,) + self.observationShape,
+                                              self.observationDtype)
+        self.actions = self._createArray('actions', (capacity,), np.int64)
+        self.rewards = self._createArray('rewards', (capacity,), np.float32)
+        self.dones = self._createArray('dones', (capacity,), np.bool_)
+        # Whether the slot starts a transition whose new state is in the next slot
+        self.valid = self._createArray('valid', (capacity,), np.bool_)
+
+        # The slot the next transition is written at, how many slots have been written and whether that slot
+        # holds the new state of the last transition
+        self.cursor = 0
+        self.filled = 0
+        self.count = 0
+        self.hasNext = False
+
+    def _createArray(self, name, shape, dtype):
+        return np.zeros(shape, dtype=dtype)
+
+    def __len__(self):
+        return self.count
+
+    def add(self, state, action, reward, newState, done):
+        '''
+        Store a transition
+
+        :param state: previous state
+        :param action: action taken
+        :param reward: reward for action
+        :param newState: new state
+        :param done: whether the game was completed
+        '''
+        # Converted first, so e.g. a float64 state still matches the float32 copy of the last new state
+        state = np.asarray(state, dtype=self.observationDtype).reshape(self.observationShape)
+        if not (self.hasNext and np.array_equal(self.observations[self.cursor], state)):
+            if self.hasNext:
+                # The last new state keeps its slot, this transition starts in the one after it
+                self._advance()
+            self.observations[self.cursor] = state
+
+        slot = self.cursor
+        self.actions[slot] = action
+        self.rewards[slot] = reward
+        self.dones[slot] = done
+        self._setValid(slot, True)
+        self._advance()
+        # The new state overwrites the oldest transition
+        self._setValid(self.cursor, False)
+        self.observations[self.cursor] = np.reshape(newState, self.observationShape)
+        self.hasNext = True
+
+    def _advance(self):
+        self.cursor = (self.cursor + 1) % self.capacity
+        self.filled = max(self.filled, self.cursor if self.cursor else self.capacity)
+
+    def _setValid(self, slot, valid):
+        if self.valid[slot] != valid:
+            self.count += 1 if valid else -1
+            self.valid[slot] = valid
+
+    def sampleIndices(self, batchSize):
+        '''
+        :param batchSize: number of transitions
+        :return: (batchSize,) slots of transitions drawn uniformly with replacement
+        '''
+        if self.count == 0:
+            raise Exception("The replay memory holds no transitions")
+        indices = self.rng.integers(0, self.filled, size=batchSize)
+        # Slots holding only a new state are drawn again, at most one slot per episode
+        invalid = np.flatnonzero(~self.valid[indices])
+        while len(invalid):
+            indices[invalid] = self.rng.integers(0, self.filled, size=len(invalid))
+            invalid = invalid[~self.valid[indices[invalid]]]
+        return indices
+
+    def gather(self, indices):
+        '''
+        :param indices: slots of transitions
+        :return: states, actions, rewards, new states, dones as contiguous arrays, the states float32
+        '''
+        return (
+            self.observations[indices].astype(np.float32),
+            self.actions[indices],
+            self.rewards[indices],
+            self.observations[(indices + 1) % self.capacity].astype(np.float32),
+            self.dones[indices]
+        )
+
+    def sample(self, batchSize):
+        '''
+        Random minibatch of transitions drawn uniformly with replacement
+
+        :param batchSize: number of transitions
+        :return: states, actions, rewards, new states, dones
+        '''
+        return self.gather(self.sampleIndices(batchSize))
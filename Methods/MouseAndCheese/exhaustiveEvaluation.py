@@ -0,0 +1,105 @@
+from Environments.MouseAndCheese.mouseAndCheeseBatch import MouseAndCheeseBatch
+import numpy as np
+
+'''
+Evaluates a greedy mouse and cheese policy from every start
+
+Every (mouse, cheese) start with the mouse off the cheese is played at once in one MouseAndCheeseBatch, the
+policy picks the actions of all of the games still running with one call per step until every game reached the
+cheese or maxSteps steps were taken. On an open map the fewest steps from a start is the Manhattan distance
+between the mouse and the cheese, so the steps a game took minus that distance is how far it was from optimal.
+
+The policy is either
+    a Q table           (width, length, width, length, 4) or (numStates, 4) array indexed by the state
+                        (mouseX, mouseY, cheeseX, cheeseY) as in the MaC_QTable scripts, the best action is taken
+    a callable          given the (N, ...) observations of the running games in the batch encoding it returns
+                        their (N, 4) Q values, e.g. lambda observations: model.predict(observations[..., None]),
+                        or their (N,) actions
+'''
+
+
+'''
+(N, 4) array of every (mouseX, mouseY, cheeseX, cheeseY) start on the map with the mouse off the cheese
+'''
+def startStates(length=10, width=10):
+    states = np.indices((width, length, width, length)).reshape(4, -1).T
+    return states[(states[:, 0] != states[:, 2]) | (states[:, 1] != states[:, 3])]
+
+
+'''
+Play the greedy policy from every start, returns a dictionary of
+    starts          (N, 4)  every start state
+    steps           (N,)    steps taken to reach the cheese, maxSteps for games that did not
+    success         (N,)    whether the game reached the cheese
+    manhattan       (N,)    fewest steps needed from the start
+    gap             (N,)    steps - manhattan for the games that reached the cheese, -1 for the others
+    successRate             fraction of the games that reached the cheese
+    meanSteps               mean steps of the games that reached the cheese
+    stepHistogram   (maxSteps + 1,) number of successful games that took each number of steps
+    optimalRate             fraction of all of the games that reached the cheese in the fewest steps
+    meanGap                 mean gap of the games that reached the cheese
+'''
+def evaluatePolicy(policy, length=10, width=10, maxSteps=100, encoding='coords'):
+    starts = startStates(length, width)
+    numGames = len(starts)
+    env = MouseAndCheeseBatch(numGames, length, width, encoding=encoding, autoReset=False,
+                              observationMode='view')
+    env.setPositions(starts[:, :2], starts[:, 2:])
+    if callable(policy):
+        chooseActions = _predictActions(policy, env)
+    else:
+        chooseActions = _tableActions(policy, env)
+
+    steps, success, _ = env.runEpisodes(lambda games, states: chooseActions(games), maxSteps)
+
+    manhattan = np.abs(starts[:, :2] - starts[:, 2:]).sum(axis=1)
+    gap = np.where(success, steps - manhattan, -1)
+    return {
+        'starts': starts,
+        'steps': steps,
+        'success': success,
+        'manhattan': manhattan,
+        'gap': gap,
+        'successRate': success.mean(),
+        'meanSteps': steps[success].mean() if success.any() else float('nan'),
+        'stepHistogram': np.bincount(steps[success], minlength=maxSteps + 1),
+        'optimalRate': (gap == 0).mean(),
+        'meanGap': gap[success].mean() if success.any() else float('nan')
+    }
+
+
+'''
+A few lines summarising the results of evaluatePolicy
+'''
+def formatReport(results):
+    lines = [
+        "Reached the cheese from {success} of {total} starts ({rate:.1%})".format(
+            success=int(results['success'].sum()), total=len(results['success']), rate=results['successRate']),
+        "Mean steps {steps:.2f}, {optimal:.1%} of the starts in the fewest steps, mean extra steps {gap:.2f}".format(
+            steps=results['meanSteps'], optimal=results['optimalRate'], gap=results['meanGap'])
+    ]
+    if results['success'].any() and results['gap'].max() > 0:
+        worst = results['gap'].argmax()
+        lines.append("Largest gap {gap} steps from mouse ({mx}, {my}), cheese ({cx}, {cy})".format(
+            gap=results['gap'][worst], mx=results['starts'][worst, 0], my=results['starts'][worst, 1],
+            cx=results['starts'][worst, 2], cy=results['starts'][worst, 3]))
+    return "\n".join(lines)
+
+
+def _tableActions(QTable, env):
+    rows = np.asarray(QTable).reshape(-1, 4)
+    if len(rows) != env.width * env.length * env.width * env.length:
+        raise Exception("A Q table of {states} states does not fit a {width}x{length} map".format(
+            states=len(rows), width=env.width, length=env.length))
+    # The greedy action of every state, looked up by the state index of each game
+    greedy = rows.argmax(axis=1)
+    return lambda games: greedy[env.getStateIndices()[games]]
+
+
+def _predictActions(predict, env):
+    def chooseActions(games):
+        output = np.asarray(predict(env.getObservation()[games]))
+        if output.ndim == 1:
+            return output
+        return output.argmax(axis=1)
+    return chooseActions
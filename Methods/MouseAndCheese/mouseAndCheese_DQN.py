@@ -10,20 +10,41 @@ Credits:
 '''
 
 from Environments.MouseAndCheese.openMouseAndCheeseEnv import OpenMouseAndCheeseEnv
+from Methods.DQN.mmapReplayBuffer import MmapReplayBuffer
+from Methods.DQN.numpyInference import NumpyQNetwork
+from Methods.DQN.prioritizedReplayBuffer import PrioritizedReplayBuffer
+from Methods.DQN.replayBuffer import ReplayBuffer
+from Methods.MouseAndCheese.exhaustiveEvaluation import evaluatePolicy, formatReport
 import numpy as np
 import random
 from keras.models import Sequential
 from keras.layers import Dense, Dropout, Flatten, Conv2D, MaxPooling2D, Conv1D, MaxPooling1D
 import math
-from collections import deque
 
 class MaC_DeepReinforcementNetwork:
 
-    def __init__(self):
+    def __init__(self, prioritized=False, memoryDirectory=None, memoryCapacity=10000):
         '''
         Creates a Deep Reinforcement Network to solve the Mouse and Cheese environment
+
+        :param prioritized: replay transitions in proportion to their TD errors instead of uniformly
+        :param memoryDirectory: keep the replay memory in memory mapped files in this directory, reopening the
+                                memory already there, instead of in RAM, not combined with prioritized
+        :param memoryCapacity: number of observation slots of the replay memory
         '''
-        self.memory = deque(maxlen=10000)
+        if prioritized and memoryDirectory is not None:
+            raise Exception("A prioritized replay memory can not be kept on disk")
+        self.prioritized = prioritized
+        # The maps hold the tile codes 0, 1 and 2, so they are stored as uint8
+        if memoryDirectory is not None:
+            self.memory = MmapReplayBuffer(memoryDirectory, capacity=memoryCapacity, observationShape=(10, 10, 1),
+                                           observationDtype=np.uint8)
+        elif prioritized:
+            self.memory = PrioritizedReplayBuffer(capacity=memoryCapacity, observationShape=(10, 10, 1),
+                                                  observationDtype=np.uint8)
+        else:
+            self.memory = ReplayBuffer(capacity=memoryCapacity, observationShape=(10, 10, 1),
+                                       observationDtype=np.uint8)
 
         # Epsilon parameter to handle taking random actions
         self.epsilon = 1.0
@@ -36,6 +57,8 @@ class MaC_DeepReinforcementNetwork:
         # Create models
         self.model = self.create_model()
         self.target_model = self.create_model()
+        # Actions are chosen by a NumPy copy of the model, refreshed every time the target model is synced
+        self.fast_model = NumpyQNetwork(self.model)
 
     def create_model(self):
         '''
@@ -67,7 +90,7 @@ class MaC_DeepReinforcementNetwork:
         if np.random.random() < self.epsilon:
             return [0,1,2,3][np.random.randint(0,4)]
         # Otherwise have the model output a vector with its 'Q' for each state
-        pred = self.model.predict(state)
+        pred = self.fast_model.predict(state)
         # Output index of largest 'Q', the action to take
         return np.argmax(pred[0])
 
@@ -81,32 +104,36 @@ class MaC_DeepReinforcementNetwork:
         :param new_state: new state
         :param done: whether the game was completed
         '''
-        self.memory.append([state, action, reward, new_state, done])
+        self.memory.add(state, action, reward, new_state, done)
 
     def replay(self):
         '''
-
-        :return:
+        Train the model on a minibatch of remembered samples, the targets of the whole minibatch come from one
+        forward pass of each network and the model takes one gradient step on them
         '''
         # Wait for then use 100 samples
         batch_size = 100
         if len(self.memory) < batch_size:
             return
         # Grab 100 random samples from previous actions and their results
-        samples = random.sample(self.memory, batch_size)
-        for sample in samples:
-            state, action, reward, new_state, done = sample
-            target = self.model.predict(state)
-            if done:
-                for i in range(4):
-                    if action == i:
-                        target[0][i] = target[0][i] + reward
-                    else:
-                        target[0][i] = -1
-            else:
-                Q_future = max(self.target_model.predict(new_state)[0])
-                target[0][action] = reward + Q_future * self.gamma
-            self.model.fit(state, target, epochs=1, verbose=0)
+        if self.prioritized:
+            states, actions, rewards, new_states, dones, weights, indices = self.memory.sample(batch_size)
+        else:
+            states, actions, rewards, new_states, dones = self.memory.sample(batch_size)
+
+        target = np.array(self.model.predict_on_batch(states))
+        Q_future = np.array(self.target_model.predict_on_batch(new_states)).max(axis=1)
+        rows = np.arange(batch_size)
+        chosen = target[rows, actions]
+        # A finished game adds the reward to the action taken and marks every other action -1
+        target[dones] = -1
+        target[rows, actions] = np.where(dones, chosen + rewards, rewards + Q_future * self.gamma)
+        if self.prioritized:
+            # The importance sampling weights scale each sample's loss, the TD errors become the new priorities
+            self.model.train_on_batch(states, target, sample_weight=weights)
+            self.memory.updatePriorities(indices, target[rows, actions] - chosen)
+        else:
+            self.model.train_on_batch(states, target)
 
     def target_train(self):
         '''
@@ -117,6 +144,7 @@ class MaC_DeepReinforcementNetwork:
         for i in range(len(target_weights)):
             target_weights[i] = weights[i]
         self.target_model.set_weights(target_weights)
+        self.fast_model.refresh(weights)
 
     def save_model(self, filename):
         '''
@@ -155,13 +183,17 @@ env = OpenMouseAndCheeseEnv()
 VIEW_TRAINING = False
 # If VIEW_TRAINING is True, then begin viewing at the the trial # below
 BEGIN_VIEWING = 10
+# Set whether the agent replays the transitions it predicts worst more often
+PRIORITIZED_REPLAY = False
+# Set to a directory to keep the replay memory on disk there and reuse it when the script is run again
+MEMORY_DIRECTORY = None
 
 # Run 100 trials, max duration of a trial 100
 trials = 100
 trial_len = 100
 
 # Create agent
-agent = MaC_DeepReinforcementNetwork()
+agent = MaC_DeepReinforcementNetwork(prioritized=PRIORITIZED_REPLAY, memoryDirectory=MEMORY_DIRECTORY)
 
 steps = []
 for trial in range(trials):
@@ -182,7 +214,7 @@ for trial in range(trials):
         # Find the score for the current state
         priorScore = euclideanDist(env.getMousePosition(), env.getCheesePosition())
         # Take action
-        state, done = env.step(action)
+        state, _, done, _ = env.step([action])
         # Find the score after the action takes place
         afterScore = euclideanDist(env.getMousePosition(), env.getCheesePosition())
         # Calculate the change in score to decide how good the action was
@@ -215,10 +247,15 @@ for trial in range(trials):
             print("\t{steps}".format(steps=step))
             break
 
-agent.save_model("success.model")
+agent.save_model("success.h5")
+if MEMORY_DIRECTORY is not None:
+    agent.memory.flush()
 '''
 After Training see how the agent preforms
 '''
+# Play the greedy policy from every start, the grid observations are given the channel axis of the model input
+print(formatReport(evaluatePolicy(lambda observations: agent.fast_model.predict(observations[..., np.newaxis]),
+                                  encoding='grid')))
 # Init new environment
 env = OpenMouseAndCheeseEnv()
 
@@ -229,7 +266,7 @@ for i in range(100):
     # Decide on action
     action = agent.act(curState)
     # Take decided action
-    state, done = env.step(action)
+    state, _, done, _ = env.step([action])
     # Show environment
     env.render()
     # Stop
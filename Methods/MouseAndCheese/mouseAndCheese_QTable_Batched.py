@@ -0,0 +1,41 @@
+'''
+Uses a batched QTable to solve a mouse attempting to reach cheese
+
+The mouse and the cheese are initialized to random locations, as in mouseAndCheese_QTable_RandomMouse_RandomCheese
+but every trial runs at the same time in a MouseAndCheeseBatch and the agent acts on and learns from all of
+them with one call per step. The learned greedy policy is then compared to the optimal one found by value
+iteration on the exact MDP.
+'''
+
+from Environments.MouseAndCheese.mouseAndCheeseBatch import MouseAndCheeseBatch
+from Methods.MouseAndCheese.exhaustiveEvaluation import evaluatePolicy, formatReport
+from Methods.Tabular.batchedQLearning import BatchedQTable
+from Methods.Tabular.valueIteration import valueIteration
+import numpy as np
+import time
+
+# Run 1000 trials at once, max duration of a trial 100
+trials = 1000
+trial_len = 100
+
+env = MouseAndCheeseBatch(trials, encoding='coords', autoReset=False, seed=0)
+agent = BatchedQTable(seed=0)
+
+start = time.time()
+# Steps taken by every trial to reach the cheese, trial_len when it did not
+steps, success, totals = env.runEpisodes(lambda games, states: agent.act(states), trial_len,
+                                         lambda games, *transitions: agent.replay(*transitions))
+print("Trained on {trials} trials in {seconds:.3f}s".format(trials=trials, seconds=time.time() - start))
+print("Mean steps to the cheese {steps:.2f}, {failed} trials did not reach it".format(
+    steps=steps.mean(), failed=int((~success).sum())))
+
+'''
+After Training compare the agent to the optimal policy
+'''
+nextState, reward, done, terminal = env.exportMDP()
+Q, V, iterations = valueIteration(nextState, reward, done, agent.gamma)
+optimal = Q.max(axis=1)
+learned = Q[np.arange(len(Q)), agent.rows.argmax(axis=1)]
+print("The greedy action is optimal in {percent:.1f}% of the states".format(
+    percent=100 * np.isclose(learned, optimal)[~terminal].mean()))
+print(formatReport(evaluatePolicy(agent.QTable)))
@@ -0,0 +1,34 @@
+'''
+Trains the mouse and cheese QTable agent on every core
+
+One worker process per core learns on its own batch of games, the workers' tables are merged after every round
+and the merged table is saved and compared to the optimal policy found by value iteration
+'''
+
+from Environments.MouseAndCheese.mouseAndCheeseMDP import exportMDP
+from Methods.Tabular.parallelQLearning import trainParallel
+from Methods.Tabular.qTableIO import saveQTable
+from Methods.Tabular.valueIteration import valueIteration
+import multiprocessing
+import numpy as np
+import time
+
+if __name__ == '__main__':
+    workers = multiprocessing.cpu_count()
+
+    start = time.time()
+    QTable, curves = trainParallel(numWorkers=workers, rounds=20, episodesPerRound=10, envsPerWorker=32, seed=0)
+    print("Trained {workers} workers in {seconds:.2f}s".format(workers=workers, seconds=time.time() - start))
+    for trial, (episodes, steps) in enumerate(zip(curves['episodes'], curves['meanSteps'])):
+        print("\tround {trial}: {episodes:.0f} episodes, {steps:.2f} mean steps".format(
+            trial=trial, episodes=episodes, steps=steps))
+    saveQTable("mouseAndCheeseQTable", QTable, {'learningRate': .5, 'gamma': .5, 'workers': workers})
+
+    '''
+    After Training compare the agent to the optimal policy
+    '''
+    nextState, reward, done, terminal = exportMDP()
+    Q, V, iterations = valueIteration(nextState, reward, done, .5)
+    learned = Q[np.arange(len(Q)), QTable.reshape(len(Q), -1).argmax(axis=1)]
+    print("The greedy action is optimal in {percent:.1f}% of the states".format(
+        percent=100 * np.isclose(learned, Q.max(axis=1))[~terminal].mean()))
@@ -11,10 +11,11 @@ The cheese is initialized always to a central location of (5,5)
 
 
 from Environments.MouseAndCheese.openMouseAndCheeseEnv import OpenMouseAndCheeseEnv
+from Methods.MouseAndCheese.exhaustiveEvaluation import evaluatePolicy, formatReport
+from Methods.Tabular.qTableIO import saveQTable
 import numpy as np
 import random
 import math
-import pickle as pkl
 
 class MaC_QTable:
 
@@ -145,7 +146,18 @@ for trial in range(trials):
 '''
 After Training see how the agent preforms
 '''
-pkl.dump(agent.QTable, open("mouseAndCheeseQTable.pkl", 'wb+'))
+# Saved as mouseAndCheeseQTable.npy and .json, loadQTable("mouseAndCheeseQTable") maps it back read only
+saveQTable("mouseAndCheeseQTable", agent.QTable, {
+    'learningRate': agent.learningRate,
+    'gamma': agent.gamma,
+    'epsilon': agent.epsilon,
+    'epsilonDecay': agent.epsilon_decay,
+    'epsilonMin': agent.epsilon_min,
+    'trials': trials,
+    'trialLength': trial_len
+})
+# Play the greedy policy from every start
+print(formatReport(evaluatePolicy(agent.QTable)))
 # Init new environment
 input("Ready to see the agent preform in a game?(Press enter)")
 for sampleGame in range(5):
@@ -0,0 +1,29 @@
+'''
+Sweeps the hyperparameters of the mouse and cheese QTable agent
+
+Every combination of the values below is a member of one population, all of them train at the same time and
+the learning curve of each member is reported at the end, best members first
+'''
+
+from Methods.Tabular.populationSweep import QTablePopulation, gridHyperparameters, sweepMouseAndCheese
+import numpy as np
+import time
+
+hyperparameters = gridHyperparameters(
+    learningRate=[.1, .25, .5, .9],
+    gamma=[.5, .9],
+    epsilonDecay=[.995, .9995],
+    epsilonMin=[.01, .1]
+)
+population = QTablePopulation(seed=0, **hyperparameters)
+
+start = time.time()
+curves = sweepMouseAndCheese(population, rounds=10, episodesPerRound=100, trialLength=100, seed=0)
+print("Trained {members} members in {seconds:.2f}s".format(members=population.size, seconds=time.time() - start))
+
+# Rank by the mean steps to the cheese over the last rounds
+order = np.argsort(curves['meanSteps'][:, -3:].mean(axis=1), kind='stable')
+for member in order:
+    print(population.getHyperparameters(member))
+    print("\tsteps   " + " ".join("{:6.2f}".format(value) for value in curves['meanSteps'][member]))
+    print("\tsuccess " + " ".join("{:6.2f}".format(value) for value in curves['successRate'][member]))
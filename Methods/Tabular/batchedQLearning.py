@@ -0,0 +1,109 @@
+import numpy as np
+
+'''
+Tabular Q learning on batches of transitions
+
+States are integer coordinate rows, e.g. [mouseX, mouseY, cheeseX, cheeseY], and index the Q table the same
+way as QTable[s0][s1][s2][s3][action] does in the MaC_QTable scripts. A whole batch of environments picks
+its actions with one call to act and a whole batch of (s, a, r, s') transitions is learned with one call to
+replay, the TD updates are scattered into the table with duplicates of the same (state, action) averaged.
+'''
+
+
+'''
+Add values into the flat positions indices of a contiguous table, several values for the same position are
+combined into one update, their mean when average is True and their sum otherwise (the same as np.add.at)
+Returns the unique positions that were updated
+'''
+def scatterAdd(table, indices, values, average=True):
+    if not table.flags.c_contiguous:
+        raise Exception("scatterAdd needs a contiguous table to update in place")
+    flat = table.reshape(-1)
+    positions, inverse, counts = np.unique(indices, return_inverse=True, return_counts=True)
+    sums = np.bincount(inverse, weights=values, minlength=len(positions))
+    if average:
+        sums /= counts
+    flat[positions] += sums
+    return positions
+
+
+class BatchedQTable:
+
+    def __init__(self, stateShape=(10, 10, 10, 10), numActions=4, learningRate=.5, gamma=.5, epsilon=1.0,
+                 epsilonDecay=.995, epsilonMin=.1, seed=None, table=None):
+        '''
+        Creates a Q table with random initial values, as np.random.rand does in the MaC_QTable scripts, or learns
+        into an existing one
+
+        :param stateShape: number of values of each state coordinate
+        :param numActions: number of actions
+        :param learningRate: step size of the TD update
+        :param gamma: discount factor
+        :param epsilon: initial chance of a random action
+        :param epsilonDecay: epsilon is multiplied by this for every action taken
+        :param epsilonMin: lowest value of epsilon
+        :param seed: seed for the initial values and the exploration
+        :param table: contiguous float64 array of shape stateShape + (numActions,) that is updated in place instead
+                      of a new random table, e.g. one in shared memory
+        '''
+        self.stateShape = tuple(stateShape)
+        self.numActions = numActions
+        self.learningRate = learningRate
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.epsilonDecay = epsilonDecay
+        self.epsilonMin = epsilonMin
+        self.rng = np.random.default_rng(seed)
+
+        if table is None:
+            table = self.rng.random(self.stateShape + (numActions,))
+        elif table.shape != self.stateShape + (numActions,):
+            raise Exception("A table of shape {shape} does not match the states and actions {expected}".format(
+                shape=table.shape, expected=self.stateShape + (numActions,)))
+        self.QTable = table
+        # One row of action values per flat state index
+        self.rows = self.QTable.reshape(-1, numActions)
+
+    def stateIndex(self, states):
+        '''
+        :param states: (N, len(stateShape)) integer coordinates
+        :return: (N,) flat state indices
+        '''
+        states = np.asarray(states)
+        return np.ravel_multi_index(tuple(states.T), self.stateShape)
+
+    def act(self, states, greedy=False):
+        '''
+        Pick an action for every state of a batch, epsilon decays once per action taken
+
+        :param states: (N, len(stateShape)) integer coordinates
+        :param greedy: always take the best action and leave epsilon alone
+        :return: (N,) actions
+        '''
+        actions = self.rows[self.stateIndex(states)].argmax(axis=1)
+        if greedy:
+            return actions
+        # Decay epsilon, N actions at once
+        self.epsilon = max(self.epsilonMin, self.epsilon * self.epsilonDecay ** len(actions))
+        explore = self.rng.random(len(actions)) < self.epsilon
+        return np.where(explore, self.rng.integers(0, self.numActions, size=len(actions)), actions)
+
+    def replay(self, states, actions, rewards, newStates, dones=None):
+        '''
+        Learn from a batch of transitions, every target is computed from the table before the update
+
+        :param states: (N, len(stateShape)) states the actions were taken in
+        :param actions: (N,) actions taken
+        :param rewards: (N,) rewards received
+        :param newStates: (N, len(stateShape)) states reached
+        :param dones: (N,) bool, the transition ended the episode so nothing is bootstrapped after it, when None
+                      every transition bootstraps as in the MaC_QTable scripts
+        :return: (N,) TD errors
+        '''
+        cells = self.stateIndex(states) * self.numActions + np.asarray(actions)
+        future = self.rows[self.stateIndex(newStates)].max(axis=1)
+        if dones is not None:
+            future = np.where(dones, 0.0, future)
+        errors = np.asarray(rewards) + self.gamma * future - self.QTable.reshape(-1)[cells]
+        scatterAdd(self.QTable, cells, self.learningRate * errors)
+        return errors
@@ -0,0 +1,160 @@
+from Environments.MouseAndCheese.mouseAndCheeseBatch import MouseAndCheeseBatch
+from Methods.Tabular.batchedQLearning import BatchedQTable, scatterAdd
+from multiprocessing import shared_memory
+import multiprocessing
+import threading
+import numpy as np
+
+'''
+Tabular Q learning on the mouse and cheese game spread over several processes
+
+Every worker process learns into its own Q table and counts its own visits, both held in shared memory, so a
+step never waits on a lock or on another worker. In every round each worker plays episodesPerRound batches of
+episodes with MouseAndCheeseBatch.runEpisodes, then all of the workers meet at a barrier and the coordinator, the calling process, merges the tables: the value of every
+(state, action) becomes the average of the workers' values weighted by how often each of them updated it during
+the round, cells no worker visited keep their value. The merged table is written back into every worker's table,
+the visit counts are cleared and the next round starts from it.
+
+The shared blocks are
+    tables  (numWorkers, *stateShape, numActions) float64   the table of every worker
+    counts  (numWorkers, *stateShape, numActions) float64   updates of every cell by every worker this round
+    stats   (numWorkers, rounds, 2) float64                 episodes that reached the cheese and their steps
+'''
+
+
+'''
+Train numWorkers learners for rounds rounds, each worker runs envsPerWorker episodes at once with the
+BatchedQTable updates, episodesPerRound times a round, an episode ends after trialLength steps if it did not
+reach the cheese
+Returns (QTable, curves), the merged (width, length, width, length, 4) table and (rounds,) arrays of
+    episodes    episodes of all of the workers that reached the cheese
+    meanSteps   mean steps of the episodes that reached the cheese
+'''
+def trainParallel(numWorkers=4, rounds=20, episodesPerRound=10, envsPerWorker=32, trialLength=100, length=10,
+                  width=10, learningRate=.5, gamma=.5, epsilonDecay=.995, epsilonMin=.1, seed=None, timeout=None):
+    config = {
+        'numWorkers': numWorkers, 'rounds': rounds, 'episodesPerRound': episodesPerRound,
+        'envsPerWorker': envsPerWorker, 'trialLength': trialLength, 'length': length, 'width': width,
+        'learningRate': learningRate, 'gamma': gamma, 'epsilonDecay': epsilonDecay, 'epsilonMin': epsilonMin,
+        'shape': (numWorkers, width, length, width, length, 4)
+    }
+    seeds = np.random.SeedSequence(seed).spawn(numWorkers + 1)
+    blocks = _createBlocks(config)
+    try:
+        tables, counts, stats = _attach(blocks, config)
+        # Every worker starts from the same random table
+        tables[:] = np.random.default_rng(seeds[-1]).random(config['shape'][1:])
+        counts[:] = 0
+        stats[:] = 0
+
+        # The workers and the coordinator meet before and after every merge
+        barrier = multiprocessing.Barrier(numWorkers + 1)
+        names = {name: block.name for name, block in blocks.items()}
+        workers = [multiprocessing.Process(target=_worker, args=(worker, config, names, barrier, seeds[worker]))
+                   for worker in range(numWorkers)]
+        for process in workers:
+            process.start()
+        finished = False
+        try:
+            for trial in range(rounds):
+                barrier.wait(timeout)
+                mergeTables(tables, counts)
+                barrier.wait(timeout)
+            finished = True
+        except threading.BrokenBarrierError:
+            raise Exception("A worker stopped before round {trial} finished".format(trial=trial))
+        finally:
+            if not finished:
+                # Release the workers still waiting at the barrier
+                barrier.abort()
+            for process in workers:
+                process.join(timeout)
+                if process.is_alive():
+                    process.terminate()
+
+        QTable = tables[0].copy()
+        curves = {
+            'episodes': stats[:, :, 0].sum(axis=0),
+            'meanSteps': stats[:, :, 1].sum(axis=0) / np.maximum(stats[:, :, 0].sum(axis=0), 1)
+        }
+        del tables, counts, stats
+    finally:
+        for block in blocks.values():
+            block.close()
+            block.unlink()
+    return QTable, curves
+
+
+'''
+Merge the (numWorkers, ...) tables in place, every cell becomes the visit count weighted average of the workers'
+values, or keeps the value it has when no worker visited it, and the counts are cleared
+'''
+def mergeTables(tables, counts):
+    flatTables = tables.reshape(len(tables), -1)
+    flatCounts = counts.reshape(len(counts), -1)
+    total = flatCounts.sum(axis=0)
+    visited = np.flatnonzero(total)
+    merged = np.einsum('wc,wc->c', flatTables[:, visited], flatCounts[:, visited]) / total[visited]
+    # The workers agree on every cell outside visited since the last merge
+    flatTables[:, visited] = merged
+    flatCounts[:] = 0
+
+
+def _worker(worker, config, names, barrier, seed):
+    blocks = {name: shared_memory.SharedMemory(name=blockName) for name, blockName in names.items()}
+    try:
+        tables, counts, stats = _attach(blocks, config)
+        _learn(worker, config, barrier, seed, tables[worker], counts[worker], stats[worker])
+        del tables, counts, stats
+    except BaseException:
+        # Release the coordinator and the other workers instead of leaving them at the barrier
+        barrier.abort()
+        raise
+    finally:
+        for block in blocks.values():
+            block.close()
+
+
+def _learn(worker, config, barrier, seed, table, visits, stats):
+    envSeed, agentSeed = seed.spawn(2)
+    numEnvs = config['envsPerWorker']
+    env = MouseAndCheeseBatch(numEnvs, config['length'], config['width'], encoding='coords', autoReset=False,
+                              seed=envSeed)
+    agent = BatchedQTable(stateShape=table.shape[:-1], numActions=table.shape[-1],
+                          learningRate=config['learningRate'], gamma=config['gamma'],
+                          epsilonDecay=config['epsilonDecay'], epsilonMin=config['epsilonMin'], seed=agentSeed,
+                          table=table)
+    ones = np.ones(numEnvs)
+
+    def act(games, states):
+        return agent.act(states)
+
+    def learn(games, states, actions, rewards, newStates, dones):
+        agent.replay(states, actions, rewards, newStates, dones)
+        scatterAdd(visits, agent.stateIndex(states) * agent.numActions + actions, ones[:len(games)], average=False)
+
+    for trial in range(config['rounds']):
+        for episode in range(config['episodesPerRound']):
+            env.reset()
+            steps, success, _ = env.runEpisodes(act, config['trialLength'], learn)
+            stats[trial, 0] += success.sum()
+            stats[trial, 1] += steps[success].sum()
+        # Wait for the others, then for the merge
+        barrier.wait()
+        barrier.wait()
+
+
+def _createBlocks(config):
+    tableBytes = int(np.prod(config['shape'])) * 8
+    return {
+        'tables': shared_memory.SharedMemory(create=True, size=tableBytes),
+        'counts': shared_memory.SharedMemory(create=True, size=tableBytes),
+        'stats': shared_memory.SharedMemory(create=True, size=config['numWorkers'] * config['rounds'] * 2 * 8)
+    }
+
+
+def _attach(blocks, config):
+    tables = np.ndarray(config['shape'], dtype=np.float64, buffer=blocks['tables'].buf)
+    counts = np.ndarray(config['shape'], dtype=np.float64, buffer=blocks['counts'].buf)
+    stats = np.ndarray((config['numWorkers'], config['rounds'], 2), dtype=np.float64, buffer=blocks['stats'].buf)
+    return tables, counts, stats
@@ -0,0 +1,147 @@
+from Environments.MouseAndCheese.mouseAndCheeseBatch import MouseAndCheeseBatch
+from Methods.Tabular.batchedQLearning import scatterAdd
+import itertools
+import numpy as np
+
+'''
+Population based hyperparameter sweeps for tabular Q learning
+
+A population of K agents is held as one (K, *stateShape, numActions) array of Q tables with one value of
+learningRate, gamma, epsilonDecay and epsilonMin per member. Every call to act or replay works on a batch of
+transitions from any mix of members, so the whole population trains in lockstep with the same vectorized
+operations a single BatchedQTable uses.
+'''
+
+
+'''
+Every combination of the given hyperparameter values as a dictionary of length K arrays, e.g.
+gridHyperparameters(learningRate=[.1, .5], gamma=[.5, .9]) gives 4 members
+'''
+def gridHyperparameters(**values):
+    names = list(values)
+    combinations = list(itertools.product(*[values[name] for name in names]))
+    return {name: np.array([combination[i] for combination in combinations], dtype=np.float64)
+            for i, name in enumerate(names)}
+
+
+class QTablePopulation:
+
+    def __init__(self, learningRate=.5, gamma=.5, epsilonDecay=.995, epsilonMin=.1, epsilon=1.0,
+                 stateShape=(10, 10, 10, 10), numActions=4, seed=None):
+        '''
+        Creates K Q tables with random initial values, K is the length of the longest hyperparameter given,
+        single values are shared by every member
+
+        :param learningRate: step size of the TD update of each member
+        :param gamma: discount factor of each member
+        :param epsilonDecay: epsilon of each member is multiplied by this for every action it takes
+        :param epsilonMin: lowest value of epsilon of each member
+        :param epsilon: initial epsilon of each member
+        :param stateShape: number of values of each state coordinate
+        :param numActions: number of actions
+        :param seed: seed for the initial values and the exploration
+        '''
+        hyperparameters = np.broadcast_arrays(*[np.asarray(value, dtype=np.float64) for value in
+                                                (learningRate, gamma, epsilonDecay, epsilonMin, epsilon)])
+        self.learningRate, self.gamma, self.epsilonDecay, self.epsilonMin, self.epsilon = \
+            [np.atleast_1d(value).copy() for value in hyperparameters]
+        self.size = len(self.learningRate)
+        self.stateShape = tuple(stateShape)
+        self.numActions = numActions
+        self.rng = np.random.default_rng(seed)
+
+        self.QTables = self.rng.random((self.size,) + self.stateShape + (numActions,))
+        # One row of action values per (member, flat state index)
+        self.rows = self.QTables.reshape(self.size, -1, numActions)
+        self.numStates = self.rows.shape[1]
+
+    def getHyperparameters(self, member):
+        '''
+        :param member: index of a member
+        :return: dictionary of the member's hyperparameters
+        '''
+        return {
+            'learningRate': float(self.learningRate[member]),
+            'gamma': float(self.gamma[member]),
+            'epsilonDecay': float(self.epsilonDecay[member]),
+            'epsilonMin': float(self.epsilonMin[member])
+        }
+
+    def stateIndex(self, states):
+        '''
+        :param states: (N, len(stateShape)) integer coordinates
+        :return: (N,) flat state indices
+        '''
+        states = np.asarray(states)
+        return np.ravel_multi_index(tuple(states.T), self.stateShape)
+
+    def act(self, members, states, greedy=False):
+        '''
+        Pick an action for every (member, state) of a batch, each member's epsilon decays once per action it takes
+
+        :param members: (N,) member of every row
+        :param states: (N, len(stateShape)) integer coordinates
+        :param greedy: always take the best action and leave epsilon alone
+        :return: (N,) actions
+        '''
+        members = np.asarray(members)
+        actions = self.rows[members, self.stateIndex(states)].argmax(axis=1)
+        if greedy:
+            return actions
+        counts = np.bincount(members, minlength=self.size)
+        self.epsilon = np.maximum(self.epsilonMin, self.epsilon * self.epsilonDecay ** counts)
+        explore = self.rng.random(len(actions)) < self.epsilon[members]
+        return np.where(explore, self.rng.integers(0, self.numActions, size=len(actions)), actions)
+
+    def replay(self, members, states, actions, rewards, newStates, dones=None):
+        '''
+        Learn from a batch of transitions, each with the hyperparameters of its member
+
+        :param members: (N,) member of every transition
+        :param states: (N, len(stateShape)) states the actions were taken in
+        :param actions: (N,) actions taken
+        :param rewards: (N,) rewards received
+        :param newStates: (N, len(stateShape)) states reached
+        :param dones: (N,) bool, nothing is bootstrapped after these transitions, when None every transition
+                      bootstraps as in the MaC_QTable scripts
+        :return: (N,) TD errors
+        '''
+        members = np.asarray(members)
+        cells = (members * self.numStates + self.stateIndex(states)) * self.numActions + np.asarray(actions)
+        future = self.rows[members, self.stateIndex(newStates)].max(axis=1)
+        if dones is not None:
+            future = np.where(dones, 0.0, future)
+        errors = np.asarray(rewards) + self.gamma[members] * future - self.QTables.reshape(-1)[cells]
+        scatterAdd(self.QTables, cells, self.learningRate[members] * errors)
+        return errors
+
+
+'''
+Train every member of a population on the mouse and cheese game at the same time
+
+Each round every member plays episodesPerRound episodes from random positions, all of them at once in one
+MouseAndCheeseBatch, for at most trialLength steps. Returns the learning curves, (K, rounds) arrays of
+    meanSteps       mean steps to the cheese, trialLength for episodes that did not reach it
+    successRate     fraction of the episodes that reached the cheese
+    meanReward      mean total reward of an episode
+'''
+def sweepMouseAndCheese(population, rounds=10, episodesPerRound=100, trialLength=100, seed=None):
+    length, width = population.stateShape[1], population.stateShape[0]
+    numEnvs = population.size * episodesPerRound
+    members = np.repeat(np.arange(population.size), episodesPerRound)
+    env = MouseAndCheeseBatch(numEnvs, length, width, encoding='coords', autoReset=False, seed=seed)
+
+    curves = {name: np.zeros((population.size, rounds)) for name in ('meanSteps', 'successRate', 'meanReward')}
+    def act(games, states):
+        return population.act(members[games], states)
+
+    def learn(games, states, actions, rewards, newStates, dones):
+        population.replay(members[games], states, actions, rewards, newStates, dones)
+
+    for trial in range(rounds):
+        env.reset()
+        steps, success, totals = env.runEpisodes(act, trialLength, learn)
+        curves['meanSteps'][:, trial] = steps.reshape(population.size, -1).mean(axis=1)
+        curves['successRate'][:, trial] = success.reshape(population.size, -1).mean(axis=1)
+        curves['meanReward'][:, trial] = totals.reshape(population.size, -1).mean(axis=1)
+    return curves
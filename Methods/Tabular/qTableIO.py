@@ -0,0 +1,85 @@
+import json
+import os
+import numpy as np
+
+'''
+Saving and loading Q tables
+
+A table is stored as two files next to each other, name.npy holds the raw array and name.json a small header
+with its shape, dtype and the hyperparameters of the agent that learned it, e.g. for the name
+"mouseAndCheeseQTable"
+
+    mouseAndCheeseQTable.npy
+    mouseAndCheeseQTable.json   {"format": 1, "shape": [10, 10, 10, 10, 4], "dtype": "<f8",
+                                 "hyperparameters": {"learningRate": 0.5, "gamma": 0.5, ...}}
+
+loadQTable memory maps the .npy read only, nothing is read until a value is used and every process that loads
+the same file shares one copy of it through the page cache instead of holding its own.
+'''
+
+FORMAT = 1
+
+
+'''
+Paths of the payload and the header of a saved table, a trailing .npy or .json on name is ignored
+'''
+def qTablePaths(name):
+    root, extension = os.path.splitext(name)
+    if extension in ('.npy', '.json'):
+        name = root
+    return name + '.npy', name + '.json'
+
+
+'''
+Save table under name with the given hyperparameters, a dictionary of JSON serializable values
+Both files are written under temporary names and renamed over the old ones, the payload first, so a reader never
+sees a half written file and a table that is memory mapped by loadQTable keeps the old file it maps
+'''
+def saveQTable(name, table, hyperparameters=None):
+    payloadPath, headerPath = qTablePaths(name)
+    table = np.ascontiguousarray(table)
+    with open(payloadPath + '.tmp', 'wb') as payloadFile:
+        np.save(payloadFile, table, allow_pickle=False)
+    os.replace(payloadPath + '.tmp', payloadPath)
+    header = {
+        'format': FORMAT,
+        'payload': os.path.basename(payloadPath),
+        'shape': list(table.shape),
+        'dtype': table.dtype.str,
+        'hyperparameters': {key: _jsonValue(value) for key, value in (hyperparameters or {}).items()}
+    }
+    with open(headerPath + '.tmp', 'w') as headerFile:
+        json.dump(header, headerFile, indent=4)
+    os.replace(headerPath + '.tmp', headerPath)
+
+
+'''
+Load the table saved under name
+Returns (table, hyperparameters), the table is a read only memory map unless writable is True, in which case it
+is read into private memory so it can be trained further
+'''
+def loadQTable(name, writable=False):
+    payloadPath, headerPath = qTablePaths(name)
+    with open(headerPath) as headerFile:
+        header = json.load(headerFile)
+    if header.get('format') != FORMAT:
+        raise Exception("Unknown Q table format {format} in {path}".format(format=header.get('format'), path=headerPath))
+
+    if writable:
+        table = np.load(payloadPath, allow_pickle=False)
+    else:
+        table = np.load(payloadPath, mmap_mode='r', allow_pickle=False)
+    if list(table.shape) != header['shape'] or table.dtype.str != header['dtype']:
+        raise Exception("{path} holds a {dtype} table of shape {shape}, its header says {headerDtype} {headerShape}"
+                        .format(path=payloadPath, dtype=table.dtype.str, shape=list(table.shape),
+                                headerDtype=header['dtype'], headerShape=header['shape']))
+    return table, header['hyperparameters']
+
+
+def _jsonValue(value):
+    # numpy scalars and arrays are not JSON serializable themselves
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
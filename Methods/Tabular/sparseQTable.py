@@ -0,0 +1,206 @@
+from Methods.Tabular.batchedQLearning import scatterAdd
+import numpy as np
+
+'''
+Tabular Q learning with rows allocated on first visit
+
+Each state, a row of non negative integer coordinates, is packed into one int64 key by giving every coordinate
+bitsPerCoordinate bits. The keys seen so far are kept sorted next to their rows, a batch of states is looked up
+with one np.searchsorted, and the rows are in a float32 array that doubles in size when it fills, so memory
+follows the states actually visited instead of the product of the coordinate ranges. A new row gets
+uniform [0, 1) values, the same as a dense np.random.rand table would have held for it.
+
+When maxStates is given the table never holds more rows than that, the least recently used states are evicted
+to make room and start again from new random values if they are visited later.
+'''
+
+
+class SparseQTable:
+
+    def __init__(self, numActions=4, learningRate=.5, gamma=.5, epsilon=1.0, epsilonDecay=.995, epsilonMin=.1,
+                 bitsPerCoordinate=15, capacity=1024, maxStates=None, seed=None):
+        '''
+        Creates an empty Q table
+
+        :param numActions: number of actions
+        :param learningRate: step size of the TD update
+        :param gamma: discount factor
+        :param epsilon: initial chance of a random action
+        :param epsilonDecay: epsilon is multiplied by this for every action taken
+        :param epsilonMin: lowest value of epsilon
+        :param bitsPerCoordinate: bits of the packed key given to each state coordinate
+        :param capacity: number of rows to allocate up front
+        :param maxStates: most rows to hold before evicting the least recently used, unlimited when None
+        :param seed: seed for the initial values and the exploration
+        '''
+        self.numActions = numActions
+        self.learningRate = learningRate
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.epsilonDecay = epsilonDecay
+        self.epsilonMin = epsilonMin
+        self.bitsPerCoordinate = bitsPerCoordinate
+        self.maxStates = maxStates
+        self.rng = np.random.default_rng(seed)
+
+        if maxStates is not None:
+            capacity = min(capacity, maxStates)
+        self.values = np.empty((capacity, numActions), dtype=np.float32)
+        self.keys = np.empty(capacity, dtype=np.int64)
+        self.lastUsed = np.zeros(capacity, dtype=np.int64)
+        # Every key held, sorted, and the row of each
+        self.sortedKeys = np.zeros(0, dtype=np.int64)
+        self.sortedRows = np.zeros(0, dtype=np.int64)
+        self.count = 0
+        self.clock = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return self.count
+
+    def packKeys(self, states):
+        '''
+        :param states: (N, d) non negative integer coordinates
+        :return: (N,) int64 keys
+        '''
+        states = np.asarray(states, dtype=np.int64)
+        if states.shape[1] * self.bitsPerCoordinate > 63:
+            raise Exception("{d} coordinates of {bits} bits do not fit in a key".format(
+                d=states.shape[1], bits=self.bitsPerCoordinate))
+        if states.min(initial=0) < 0 or states.max(initial=0) >= 1 << self.bitsPerCoordinate:
+            raise Exception("State coordinates must be in [0, {limit})".format(limit=1 << self.bitsPerCoordinate))
+        shifts = np.arange(states.shape[1], dtype=np.int64) * self.bitsPerCoordinate
+        return (states << shifts).sum(axis=1)
+
+    def rowsOf(self, states):
+        '''
+        Rows of a batch of states, states seen for the first time are given new rows
+
+        :param states: (N, d) non negative integer coordinates
+        :return: (N,) row indices into values
+        '''
+        keys = self.packKeys(states)
+        self.clock += 1
+        positions = np.minimum(np.searchsorted(self.sortedKeys, keys), max(len(self.sortedKeys) - 1, 0))
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        if len(self.sortedKeys):
+            found = self.sortedKeys[positions] == keys
+            rows[found] = self.sortedRows[positions[found]]
+        missing = rows < 0
+        if missing.any():
+            self.lastUsed[rows[~missing]] = self.clock
+            newKeys, inverse = np.unique(keys[missing], return_inverse=True)
+            rows[missing] = self._allocate(newKeys)[inverse]
+        self.lastUsed[rows] = self.clock
+        return rows
+
+    def _allocate(self, keys):
+        needed = len(keys)
+        evict = 0
+        if self.maxStates is not None:
+            evict = max(0, self.count + needed - self.maxStates)
+        if evict > 0:
+            # Reuse the least recently used rows, never one touched by the current batch
+            candidates = np.flatnonzero(self.lastUsed[:self.count] < self.clock)
+            if len(candidates) < evict:
+                raise Exception("A batch needs more than {limit} states".format(limit=self.maxStates))
+            oldest = candidates[np.argpartition(self.lastUsed[candidates], evict - 1)[:evict]]
+            evicted = np.searchsorted(self.sortedKeys, self.keys[oldest])
+            self.sortedKeys = np.delete(self.sortedKeys, evicted)
+            self.sortedRows = np.delete(self.sortedRows, evicted)
+            self.evictions += evict
+        else:
+            oldest = np.zeros(0, dtype=np.int64)
+        self._grow(self.count + needed - evict)
+        rows = np.concatenate([oldest, np.arange(self.count, self.count + needed - evict)])
+        self.count += needed - evict
+
+        self.values[rows] = self.rng.random((needed, self.numActions), dtype=np.float32)
+        self.keys[rows] = keys
+        # keys are sorted and new, so inserting each at its position keeps the array sorted
+        positions = np.searchsorted(self.sortedKeys, keys)
+        self.sortedKeys = np.insert(self.sortedKeys, positions, keys)
+        self.sortedRows = np.insert(self.sortedRows, positions, rows)
+        return rows
+
+    def _grow(self, size):
+        if size <= len(self.values):
+            return
+        capacity = max(size, 2 * len(self.values))
+        if self.maxStates is not None:
+            capacity = min(capacity, self.maxStates)
+        for field in ('values', 'keys', 'lastUsed'):
+            old = getattr(self, field)
+            grown = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[:self.count] = old[:self.count]
+            setattr(self, field, grown)
+
+    def act(self, state):
+        '''
+        Request that the model takes an action on the given state
+        :param state: state to output an action for
+        :return: action to take {0,1,2,3}
+        '''
+        # Decay epsilon
+        self.epsilon *= self.epsilonDecay
+        # Check that epsilon is not below its minimum value
+        self.epsilon = max(self.epsilonMin, self.epsilon)
+
+        # Visiting the state allocates its row, as the dense table always has one
+        row = self.rowsOf([state])[0]
+        # There is an epsilon chance that a random action will be taken
+        if self.rng.random() < self.epsilon:
+            return int(self.rng.integers(0, self.numActions))
+        # Output index of largest 'Q', the action to take
+        return int(np.argmax(self.values[row]))
+
+    def replay(self, curState, action, reward, newState):
+        '''
+        Update the QTable based on the event that occured
+        :param curState: state the action was taken in
+        :param action: action taken
+        :param reward: reward received
+        :param newState: state reached
+        '''
+        current, new = self.rowsOf([curState, newState])
+        currentQ = self.values[current, action]
+        self.values[current, action] = currentQ + self.learningRate * (
+            reward + self.gamma * self.values[new].max() - currentQ)
+
+    def actBatch(self, states, greedy=False):
+        '''
+        Pick an action for every state of a batch, epsilon decays once per action taken
+
+        :param states: (N, d) integer coordinates
+        :param greedy: always take the best action and leave epsilon alone
+        :return: (N,) actions
+        '''
+        # Allocating the rows can grow values, so they are found before values is read
+        rows = self.rowsOf(states)
+        actions = self.values[rows].argmax(axis=1)
+        if greedy:
+            return actions
+        self.epsilon = max(self.epsilonMin, self.epsilon * self.epsilonDecay ** len(actions))
+        explore = self.rng.random(len(actions)) < self.epsilon
+        return np.where(explore, self.rng.integers(0, self.numActions, size=len(actions)), actions)
+
+    def replayBatch(self, states, actions, rewards, newStates, dones=None):
+        '''
+        Learn from a batch of transitions, duplicates of a (state, action) are averaged as in BatchedQTable
+
+        :param states: (N, d) states the actions were taken in
+        :param actions: (N,) actions taken
+        :param rewards: (N,) rewards received
+        :param newStates: (N, d) states reached
+        :param dones: (N,) bool, nothing is bootstrapped after these transitions, when None every one bootstraps
+        :return: (N,) TD errors
+        '''
+        count = len(actions)
+        rows = self.rowsOf(np.concatenate([states, newStates]))
+        cells = rows[:count] * self.numActions + np.asarray(actions)
+        future = self.values[rows[count:]].max(axis=1).astype(np.float64)
+        if dones is not None:
+            future = np.where(dones, 0.0, future)
+        errors = np.asarray(rewards) + self.gamma * future - self.values.reshape(-1)[cells]
+        scatterAdd(self.values, cells, self.learningRate * errors)
+        return errors
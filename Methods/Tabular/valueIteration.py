@@ -0,0 +1,78 @@
+import numpy as np
+
+'''
+Exact solvers for small deterministic MDPs given as tables
+
+    nextState   (numStates, numActions) int   state reached by taking an action in a state
+    reward      (numStates, numActions) float reward for taking an action in a state
+    done        (numStates, numActions) bool  the action ends the episode, nothing is bootstrapped after it
+
+as exported by Environments.MouseAndCheese.mouseAndCheeseMDP.exportMDP. Every sweep updates all states at
+once with a gather of the next state values, so a 10^4 state table is solved in milliseconds.
+'''
+
+
+'''
+Q values of every (state, action) given the values V of every state
+'''
+def backup(nextState, reward, done, gamma, V):
+    return reward + gamma * np.where(done, 0.0, V[nextState])
+
+
+'''
+Value iteration, sweeps until the values change by less than tol
+Returns (Q, V, iterations)
+'''
+def valueIteration(nextState, reward, done, gamma, tol=1e-10, maxIterations=100000):
+    if not 0 <= gamma < 1:
+        raise Exception("gamma must be in [0, 1) for value iteration to converge")
+    V = np.zeros(len(nextState))
+    for iteration in range(1, maxIterations + 1):
+        Q = backup(nextState, reward, done, gamma, V)
+        newV = Q.max(axis=1)
+        change = np.abs(newV - V).max()
+        V = newV
+        if change < tol:
+            break
+    return backup(nextState, reward, done, gamma, V), V, iteration
+
+
+'''
+Policy iteration, the policy is evaluated by sweeping its Bellman equation until it changes by less than tol
+and is then made greedy, until it stops changing
+Returns (Q, V, policy, iterations)
+'''
+def policyIteration(nextState, reward, done, gamma, tol=1e-10, maxIterations=1000, policy=None):
+    if not 0 <= gamma < 1:
+        raise Exception("gamma must be in [0, 1) for policy iteration to converge")
+    states = np.arange(len(nextState))
+    if policy is None:
+        policy = np.zeros(len(nextState), dtype=np.int64)
+    V = np.zeros(len(nextState))
+    for iteration in range(1, maxIterations + 1):
+        # Evaluate the policy
+        policyNext = nextState[states, policy]
+        policyReward = reward[states, policy]
+        policyContinue = ~done[states, policy]
+        while True:
+            newV = policyReward + gamma * np.where(policyContinue, V[policyNext], 0.0)
+            change = np.abs(newV - V).max()
+            V = newV
+            if change < tol:
+                break
+        # Improve it, keeping the current action on ties so that it terminates
+        Q = backup(nextState, reward, done, gamma, V)
+        greedy = Q.argmax(axis=1)
+        keep = Q[states, policy] >= Q[states, greedy] - tol
+        newPolicy = np.where(keep, policy, greedy)
+        if (newPolicy == policy).all():
+            break
+        policy = newPolicy
+    return Q, V, policy, iteration
+
+
+'''
+Greedy action of every state
+'''
+def greedyPolicy(Q):
+    return Q.argmax(axis=1)
@@ -63,7 +63,8 @@ class LogResultsCallback(BaseCallback):
 
         return True
 
-# Create and wrap the environment
+# Create and wrap the environment, observations are copied because the vectorized wrapper keeps the
+# final observation of an episode after it resets the environment
 env = UniformTileEnv(6,6,1)
 
 # Create directories